@@ -1,5 +1,6 @@
 """Discord bot implementation."""
 import discord
+import functools
 from discord import app_commands
 from discord.ext import commands
 import logging
@@ -9,6 +10,41 @@ from database import Database
 
 logger = logging.getLogger(__name__)
 
+# Embed color for each stock status
+_STATUS_COLORS = {
+    'in_stock': 0x00ff00,  # Green
+    'out_of_stock': 0xff0000,  # Red
+    'pre_order': 0xffaa00,  # Orange
+    'unknown': 0x808080,  # Gray
+    'error': 0xff0000,  # Red
+}
+
+# Emoji for each stock status ('in_stock' only applies when the set is available)
+_STATUS_EMOJI = {
+    'in_stock': '✅',
+    'out_of_stock': '❌',
+    'pre_order': '⏰',
+    'error': '⚠️',
+}
+
+# (substring, emoji) pairs for purchase button text, checked in order
+_BUTTON_EMOJI = (
+    ('pre-order', '⏰'),  # Clock for pre-order
+    ('preorder', '⏰'),
+    ('add to bag', '🛒'),  # Shopping cart for add to bag/cart
+    ('add to cart', '🛒'),
+    ('notify', '🔔'),  # Bell for notify
+    ('out of stock', '❌'),  # X for out of stock
+    ('sold out', '❌'),
+)
+
+
+@functools.lru_cache(maxsize=256)
+def _pick_button_emoji(button_text: str) -> str:
+    """Pick the emoji for purchase button text (memoized; LEGO.com only uses a handful of labels)."""
+    button_lower = button_text.lower()
+    return next((emoji for needle, emoji in _BUTTON_EMOJI if needle in button_lower), '🔘')
+
 
 class LEGOBot(commands.Bot):
     """Discord bot for checking LEGO stock."""
@@ -28,50 +64,48 @@ class LEGOBot(commands.Bot):
         
         self.lego_checker = LEGOChecker()
         self.db = Database()
+        self._synced = False
     
     async def setup_hook(self):
         """Called when the bot is starting up."""
         await self.db.initialize()
+        
+        # Register slash commands globally with a single bulk overwrite.
+        # on_ready can fire again on every reconnect, so syncing happens here.
+        if not self._synced:
+            try:
+                synced = await self.tree.sync()
+                self._synced = True
+                logger.info(f"Synced {len(synced)} global command(s)")
+            except Exception as e:
+                logger.error(f"Failed to sync commands: {e}")
+        
         logger.info("Bot setup complete")
     
+    async def close(self):
+        """Close the Discord connection and release the database and scrape pool."""
+        await super().close()
+        await self.db.close()
+        self.lego_checker.close()
+    
     async def on_ready(self):
         """Called when the bot is ready."""
         logger.info(f"{self.user} has logged in")
-        try:
-            # Clear all global commands first to avoid duplicates
-            try:
-                self.tree.clear_commands(guild=None)
-                await self.tree.sync()  # Sync empty to clear global commands
-                logger.info("Cleared all global commands")
-            except Exception as e:
-                logger.warning(f"Could not clear global commands: {e}")
-            
-            # Sync to all guilds (instant, no duplicates)
-            synced_count = 0
-            for guild in self.guilds:
-                try:
-                    # Clear existing guild commands first
-                    self.tree.clear_commands(guild=guild)
-                    # Copy commands to this guild
-                    self.tree.copy_global_to(guild=guild)
-                    # Sync to this specific guild
-                    synced = await self.tree.sync(guild=guild)
-                    synced_count += len(synced)
-                    logger.info(f"Synced {len(synced)} command(s) to guild {guild.name} ({guild.id})")
-                except Exception as e:
-                    logger.warning(f"Failed to sync commands to guild {guild.name}: {e}")
-            
-            if synced_count > 0:
-                logger.info(f"Total: Synced {synced_count} command(s) to {len(self.guilds)} guild(s)")
-            else:
-                logger.info("No guilds found to sync commands to")
-        except Exception as e:
-            logger.error(f"Failed to sync commands: {e}")
         
         # Start monitor if it exists
         if hasattr(self, 'monitor'):
             await self.monitor.start()
     
+    async def on_guild_channel_delete(self, channel: discord.abc.GuildChannel):
+        """Called when a channel is deleted; drops the monitor's cached fallback channel."""
+        if hasattr(self, 'monitor'):
+            self.monitor.invalidate_guild(channel.guild.id)
+    
+    async def on_guild_channel_update(self, before: discord.abc.GuildChannel, after: discord.abc.GuildChannel):
+        """Called when a channel changes (e.g. its permissions); drops the monitor's cached fallback channel."""
+        if hasattr(self, 'monitor'):
+            self.monitor.invalidate_guild(after.guild.id)
+    
     def get_status_color(self, status: str) -> int:
         """Get the embed color for a stock status.
         
@@ -81,14 +115,7 @@ class LEGOBot(commands.Bot):
         Returns:
             Discord color integer
         """
-        status_colors = {
-            'in_stock': 0x00ff00,  # Green
-            'out_of_stock': 0xff0000,  # Red
-            'pre_order': 0xffaa00,  # Orange
-            'unknown': 0x808080,  # Gray
-            'error': 0xff0000,  # Red
-        }
-        return status_colors.get(status, 0x808080)
+        return _STATUS_COLORS.get(status, 0x808080)
     
     def get_status_emoji(self, status: str, available: bool) -> str:
         """Get an emoji for a stock status.
@@ -100,16 +127,20 @@ class LEGOBot(commands.Bot):
         Returns:
             Emoji string
         """
-        if status == 'in_stock' and available:
-            return '✅'
-        elif status == 'out_of_stock':
-            return '❌'
-        elif status == 'pre_order':
-            return '⏰'
-        elif status == 'error':
-            return '⚠️'
-        else:
+        if status == 'in_stock' and not available:
             return '❓'
+        return _STATUS_EMOJI.get(status, '❓')
+    
+    def get_button_emoji(self, button_text: str) -> str:
+        """Get an emoji for a detected purchase button.
+        
+        Args:
+            button_text: The button text
+            
+        Returns:
+            Emoji string
+        """
+        return _pick_button_emoji(button_text)
 
 
 # Create bot instance
@@ -123,7 +154,7 @@ async def check_stock(interaction: discord.Interaction, set_code: str):
     await interaction.response.defer()
     
     try:
-        result = bot.lego_checker.check_stock(set_code)
+        result = await bot.lego_checker.check_stock_async(set_code)
         
         embed = discord.Embed(
             title=f"{bot.get_status_emoji(result['status'], result['available'])} {result['set_name']}",
@@ -141,19 +172,7 @@ async def check_stock(interaction: discord.Interaction, set_code: str):
         # Show button detected if available - make it prominent and easy to read
         if result.get('button_detected'):
             button_text = result['button_detected']
-            button_lower = button_text.lower()
-            
-            # Choose emoji based on button type
-            if 'pre-order' in button_lower or 'preorder' in button_lower:
-                emoji = "⏰"  # Clock for pre-order
-            elif 'add to bag' in button_lower or 'add to cart' in button_lower:
-                emoji = "🛒"  # Shopping cart for add to bag/cart
-            elif 'notify' in button_lower:
-                emoji = "🔔"  # Bell for notify
-            elif 'out of stock' in button_lower or 'sold out' in button_lower:
-                emoji = "❌"  # X for out of stock
-            else:
-                emoji = "🔘"  # Default button emoji
+            emoji = bot.get_button_emoji(button_text)
             
             # Make it bigger and more visible (Discord doesn't support font size, so we use formatting)
             embed.add_field(
@@ -190,7 +209,7 @@ async def watch(interaction: discord.Interaction, set_code: str):
     
     try:
         # First verify the set exists by checking stock
-        result = bot.lego_checker.check_stock(set_code)
+        result = await bot.lego_checker.check_stock_async(set_code)
         
         if result['status'] == 'error':
             await interaction.followup.send(
@@ -199,11 +218,19 @@ async def watch(interaction: discord.Interaction, set_code: str):
             )
             return
         
-        # Add to watchlist
+        # Add to watchlist, recording the status we just fetched so the
+        # monitor doesn't need to re-scrape it straight away
         guild_id = interaction.guild_id if interaction.guild else None
-        success = await bot.db.add_watch(interaction.user.id, set_code, guild_id)
+        success = await bot.db.add_watch(
+            interaction.user.id, set_code, guild_id,
+            initial_status=result['status'],
+            initial_button=result.get('button_detected')
+        )
         
         if success:
+            if hasattr(bot, 'monitor'):
+                bot.monitor.notify_watch_added()
+            
             embed = discord.Embed(
                 title="✅ Added to Watchlist",
                 description=f"**{result['set_name']}** (Set {set_code})",
@@ -255,6 +282,91 @@ async def unwatch(interaction: discord.Interaction, set_code: str):
         )
 
 
+# Number of watches shown per /my-watches page
+WATCHES_PAGE_SIZE = 10
+
+
+def build_watchlist_embed(watches: list, total: int, offset: int) -> discord.Embed:
+    """Build the embed for one page of a user's watchlist.
+    
+    Args:
+        watches: The watches on this page
+        total: Total number of watches the user has
+        offset: Index of the first watch on this page
+        
+    Returns:
+        Discord embed
+    """
+    embed = discord.Embed(
+        title=f"📋 Your Watchlist ({total} set{'s' if total != 1 else ''})",
+        color=0x0099ff
+    )
+    
+    embed.description = "\n".join(
+        f"**{watch['set_code']}** - {(watch['last_status'] or 'Not checked yet').replace('_', ' ').title()}"
+        for watch in watches
+    ) or "No watches found"
+    
+    if total > WATCHES_PAGE_SIZE:
+        page = offset // WATCHES_PAGE_SIZE + 1
+        pages = (total + WATCHES_PAGE_SIZE - 1) // WATCHES_PAGE_SIZE
+        embed.set_footer(text=f"Page {page} of {pages}")
+    
+    return embed
+
+
+class WatchPager(discord.ui.View):
+    """Previous/Next buttons for paging through a user's watchlist."""
+    
+    def __init__(self, user_id: int, guild_id: Optional[int], total: int):
+        """Initialize the pager on the first page.
+        
+        Args:
+            user_id: Discord user ID whose watchlist is shown
+            guild_id: Optional Discord guild/server ID
+            total: Total number of watches the user has
+        """
+        super().__init__(timeout=300)
+        self.user_id = user_id
+        self.guild_id = guild_id
+        self.total = total
+        self.offset = 0
+        self._update_buttons()
+    
+    def _update_buttons(self):
+        """Enable or disable the buttons for the current page."""
+        self.previous_page.disabled = self.offset <= 0
+        self.next_page.disabled = self.offset + WATCHES_PAGE_SIZE >= self.total
+    
+    async def _show_page(self, interaction: discord.Interaction):
+        """Load the current page from the database and redraw the message."""
+        # The watchlist may have changed since the message was sent
+        self.total = await bot.db.get_user_watches_count(self.user_id, self.guild_id)
+        last_offset = max(0, (self.total - 1) // WATCHES_PAGE_SIZE * WATCHES_PAGE_SIZE)
+        self.offset = min(max(0, self.offset), last_offset)
+        
+        watches = await bot.db.get_user_watches_page(
+            self.user_id, self.guild_id, self.offset, WATCHES_PAGE_SIZE
+        )
+        self._update_buttons()
+        await interaction.response.edit_message(
+            embed=build_watchlist_embed(watches, self.total, self.offset),
+            view=self
+        )
+    
+    @discord.ui.button(label="Previous", emoji="◀️", style=discord.ButtonStyle.secondary)
+    async def previous_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        """Show the previous page."""
+        self.offset -= WATCHES_PAGE_SIZE
+        await self._show_page(interaction)
+    
+    @discord.ui.button(label="Next", emoji="▶️", style=discord.ButtonStyle.secondary)
+    async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        """Show the next page."""
+        self.offset += WATCHES_PAGE_SIZE
+        await self._show_page(interaction)
+
+
 @bot.tree.command(name="my-watches", description="List all sets you're watching")
 async def my_watches(interaction: discord.Interaction):
     """List all sets the user is watching."""
@@ -262,33 +374,24 @@ async def my_watches(interaction: discord.Interaction):
     
     try:
         guild_id = interaction.guild_id if interaction.guild else None
-        watches = await bot.db.get_user_watches(interaction.user.id, guild_id)
+        total = await bot.db.get_user_watches_count(interaction.user.id, guild_id)
         
-        if not watches:
+        if not total:
             await interaction.followup.send(
                 "📋 You're not watching any sets. Use `/watch <set_code>` to add one!",
                 ephemeral=True
             )
             return
         
-        embed = discord.Embed(
-            title=f"📋 Your Watchlist ({len(watches)} set{'s' if len(watches) != 1 else ''})",
-            color=0x0099ff
-        )
+        # Only the first page is loaded; the pager fetches the others on demand
+        watches = await bot.db.get_user_watches_page(interaction.user.id, guild_id, 0, WATCHES_PAGE_SIZE)
+        embed = build_watchlist_embed(watches, total, 0)
         
-        # Group watches into chunks if there are many
-        watch_list = []
-        for watch in watches[:10]:  # Limit to 10 for display
-            set_code = watch['set_code']
-            last_status = watch['last_status'] or 'Not checked yet'
-            watch_list.append(f"**{set_code}** - {last_status.replace('_', ' ').title()}")
-        
-        embed.description = "\n".join(watch_list) if watch_list else "No watches found"
-        
-        if len(watches) > 10:
-            embed.set_footer(text=f"Showing 10 of {len(watches)} sets")
-        
-        await interaction.followup.send(embed=embed, ephemeral=True)
+        if total > WATCHES_PAGE_SIZE:
+            view = WatchPager(interaction.user.id, guild_id, total)
+            await interaction.followup.send(embed=embed, view=view, ephemeral=True)
+        else:
+            await interaction.followup.send(embed=embed, ephemeral=True)
         
     except Exception as e:
         logger.error(f"Error in my_watches command: {e}")
@@ -303,8 +406,11 @@ async def my_watches(interaction: discord.Interaction):
 @app_commands.default_permissions(administrator=True)
 async def set_notification_channel(interaction: discord.Interaction, channel: discord.TextChannel):
     """Set the notification channel for the server."""
+    # Defer first so the checks below can't run past the interaction deadline
+    await interaction.response.defer(ephemeral=True)
+    
     if not interaction.guild:
-        await interaction.response.send_message(
+        await interaction.followup.send(
             "❌ This command can only be used in a server.",
             ephemeral=True
         )
@@ -312,14 +418,12 @@ async def set_notification_channel(interaction: discord.Interaction, channel: di
     
     # Check if user has administrator permission
     if not interaction.user.guild_permissions.administrator:
-        await interaction.response.send_message(
+        await interaction.followup.send(
             "❌ You need administrator permissions to set the notification channel.",
             ephemeral=True
         )
         return
     
-    await interaction.response.defer(ephemeral=True)
-    
     try:
         # Check if bot can send messages in the channel
         if not channel.permissions_for(interaction.guild.me).send_messages:
@@ -347,8 +451,11 @@ async def set_notification_channel(interaction: discord.Interaction, channel: di
 @app_commands.default_permissions(administrator=True)
 async def clear_notification_channel(interaction: discord.Interaction):
     """Clear the notification channel for the server."""
+    # Defer first so the checks below can't run past the interaction deadline
+    await interaction.response.defer(ephemeral=True)
+    
     if not interaction.guild:
-        await interaction.response.send_message(
+        await interaction.followup.send(
             "❌ This command can only be used in a server.",
             ephemeral=True
         )
@@ -356,14 +463,12 @@ async def clear_notification_channel(interaction: discord.Interaction):
     
     # Check if user has administrator permission
     if not interaction.user.guild_permissions.administrator:
-        await interaction.response.send_message(
+        await interaction.followup.send(
             "❌ You need administrator permissions to clear the notification channel.",
             ephemeral=True
         )
         return
     
-    await interaction.response.defer(ephemeral=True)
-    
     try:
         await bot.db.clear_notification_channel(interaction.guild.id)
         await interaction.followup.send(
@@ -378,10 +483,10 @@ async def clear_notification_channel(interaction: discord.Interaction):
         )
 
 
-@bot.tree.command(name="sync-commands", description="Manually sync slash commands to this server (Admin only)")
+@bot.tree.command(name="sync-commands", description="Manually re-sync slash commands (Admin only)")
 @app_commands.default_permissions(administrator=True)
 async def sync_commands(interaction: discord.Interaction):
-    """Manually sync slash commands to the current guild."""
+    """Manually re-sync slash commands and clear stale copies in the current guild."""
     if not interaction.guild:
         await interaction.response.send_message(
             "❌ This command can only be used in a server.",
@@ -392,30 +497,22 @@ async def sync_commands(interaction: discord.Interaction):
     await interaction.response.defer(ephemeral=True)
     
     try:
-        # First, try to clear global commands (in case they exist)
-        try:
-            bot.tree.clear_commands(guild=None)
-            await bot.tree.sync()  # Sync empty to clear
-            logger.info("Cleared global commands before guild sync")
-        except Exception as clear_error:
-            logger.debug(f"Could not clear global commands (may not exist): {clear_error}")
-        
-        # Clear any existing guild commands first to avoid duplicates
+        # Commands are registered globally. Drop any guild-scoped copies left
+        # over from older per-guild syncing, which show up as duplicates.
         bot.tree.clear_commands(guild=interaction.guild)
-        # Copy commands to this guild
-        bot.tree.copy_global_to(guild=interaction.guild)
-        # Sync to this specific guild (instant)
-        synced = await bot.tree.sync(guild=interaction.guild)
+        await bot.tree.sync(guild=interaction.guild)
+        # Re-push the global commands
+        synced = await bot.tree.sync()
         await interaction.followup.send(
-            f"✅ Successfully synced {len(synced)} command(s) to this server!\n"
-            f"Commands should appear immediately. Try typing `/` to see them.\n\n"
+            f"✅ Successfully synced {len(synced)} command(s)!\n"
+            f"Try typing `/` to see them.\n\n"
             f"**If you still see duplicates:**\n"
-            f"1. Wait 5-10 minutes for Discord to clear cached global commands\n"
+            f"1. Wait 5-10 minutes for Discord to refresh its command cache\n"
             f"2. Restart Discord completely\n"
             f"3. Or remove duplicates manually in Server Settings → Integrations → Your Bot",
             ephemeral=True
         )
-        logger.info(f"Manually synced {len(synced)} command(s) to guild {interaction.guild.name} via sync-commands")
+        logger.info(f"Manually synced {len(synced)} global command(s) via sync-commands in guild {interaction.guild.name}")
     except Exception as e:
         logger.error(f"Error syncing commands: {e}")
         await interaction.followup.send(
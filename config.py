@@ -1,20 +1,43 @@
 """Configuration management for the LEGO bot."""
+import functools
 import os
+from types import SimpleNamespace
 from dotenv import load_dotenv
 
-# Load environment variables from .env file
-load_dotenv()
 
-# Discord Bot Token
-DISCORD_BOT_TOKEN = os.getenv("DISCORD_BOT_TOKEN")
+@functools.lru_cache(maxsize=1)
+def get_config() -> SimpleNamespace:
+    """Load settings from the environment (and .env file) on first use.
+    
+    Returns:
+        Namespace with the bot settings
+    """
+    # Load environment variables from .env file
+    load_dotenv()
+    
+    return SimpleNamespace(
+        # Discord Bot Token (checked by get_bot_token)
+        discord_bot_token=os.getenv("DISCORD_BOT_TOKEN"),
+        # Monitoring configuration
+        monitor_interval_minutes=int(os.getenv("MONITOR_INTERVAL_MINUTES", "5")),
+        rate_limit_delay_seconds=float(os.getenv("RATE_LIMIT_DELAY_SECONDS", "2.0")),
+        check_concurrency=int(os.getenv("CHECK_CONCURRENCY", "4")),
+        stock_cache_ttl_seconds=float(os.getenv("STOCK_CACHE_TTL_SECONDS", "30")),
+        # Database file path
+        database_path=os.getenv("DATABASE_PATH", "lego_bot.db"),
+    )
 
-if not DISCORD_BOT_TOKEN:
-    raise ValueError("DISCORD_BOT_TOKEN environment variable is required")
-
-# Monitoring configuration
-MONITOR_INTERVAL_MINUTES = int(os.getenv("MONITOR_INTERVAL_MINUTES", "5"))
-RATE_LIMIT_DELAY_SECONDS = float(os.getenv("RATE_LIMIT_DELAY_SECONDS", "2.0"))
-
-# Database file path
-DATABASE_PATH = os.getenv("DATABASE_PATH", "lego_bot.db")
 
+def get_bot_token() -> str:
+    """Get the Discord bot token.
+    
+    Returns:
+        The bot token
+        
+    Raises:
+        ValueError: If DISCORD_BOT_TOKEN is not set
+    """
+    token = get_config().discord_bot_token
+    if not token:
+        raise ValueError("DISCORD_BOT_TOKEN environment variable is required")
+    return token
@@ -1,54 +1,81 @@
 """Database module for managing watchlists."""
+import asyncio
 import aiosqlite
 import logging
-from typing import List, Optional, Dict
-from datetime import datetime
-from config import DATABASE_PATH
+import time
+from typing import List, Optional, Dict, Tuple
+from config import get_config
 
 logger = logging.getLogger(__name__)
 
 
+def _now() -> int:
+    """Current time as integer Unix epoch seconds (UTC), used for stored timestamps."""
+    return int(time.time())
+
+
 class Database:
     """Handles database operations for watchlists."""
     
-    def __init__(self, db_path: str = DATABASE_PATH):
+    def __init__(self, db_path: Optional[str] = None):
         """Initialize the database.
         
         Args:
-            db_path: Path to the SQLite database file
+            db_path: Path to the SQLite database file (defaults to DATABASE_PATH)
         """
-        self.db_path = db_path
+        self.db_path = db_path or get_config().database_path
+        self._db: Optional[aiosqlite.Connection] = None
         self._initialized = False
+        # Serializes write transactions on the shared connection, so one
+        # method's commit or rollback can't take in another's pending writes
+        self._write_lock = asyncio.Lock()
+        # guild_id -> notification channel ID (None if unset); only changed
+        # through set_/clear_notification_channel, so it never goes stale
+        self._notif_cache: Dict[int, Optional[int]] = {}
     
     async def initialize(self):
-        """Initialize the database and create tables if they don't exist."""
+        """Open the database connection and create tables if they don't exist."""
         if self._initialized:
             return
         
-        async with aiosqlite.connect(self.db_path) as db:
-            await db.execute("""
-                CREATE TABLE IF NOT EXISTS watched_sets (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    user_id INTEGER NOT NULL,
-                    guild_id INTEGER,
-                    set_code TEXT NOT NULL,
-                    last_status TEXT,
-                    last_button_detected TEXT,
-                    last_checked TIMESTAMP,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    UNIQUE(user_id, guild_id, set_code)
-                )
-            """)
-            # Create server_settings table for notification channels
-            await db.execute("""
-                CREATE TABLE IF NOT EXISTS server_settings (
-                    guild_id INTEGER PRIMARY KEY,
-                    notification_channel_id INTEGER,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
-            await db.commit()
-            
+        # One long-lived connection is shared by every query
+        self._db = await aiosqlite.connect(self.db_path)
+        self._db.row_factory = aiosqlite.Row
+        await self._db.execute("PRAGMA journal_mode=WAL")
+        await self._db.execute("PRAGMA synchronous=NORMAL")
+        
+        # A freshly created watched_sets table already has the full schema,
+        # so the column migration below only runs for existing databases
+        cursor = await self._db.execute("""
+            SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'watched_sets'
+        """)
+        table_existed = await cursor.fetchone() is not None
+        
+        # Run all schema work in one transaction so it commits once
+        await self._db.execute("BEGIN")
+        await self._db.execute("""
+            CREATE TABLE IF NOT EXISTS watched_sets (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER NOT NULL,
+                guild_id INTEGER,
+                set_code TEXT NOT NULL,
+                last_status TEXT,
+                last_button_detected TEXT,
+                last_checked TIMESTAMP,  -- Unix epoch seconds
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                UNIQUE(user_id, guild_id, set_code)
+            )
+        """)
+        # Create server_settings table for notification channels
+        await self._db.execute("""
+            CREATE TABLE IF NOT EXISTS server_settings (
+                guild_id INTEGER PRIMARY KEY,
+                notification_channel_id INTEGER,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        
+        if table_existed:
             # Dynamic migration: Add any missing columns from the expected schema
             # Expected columns and their types (excluding id which is PRIMARY KEY)
             expected_columns = {
@@ -62,7 +89,7 @@ class Database:
             }
             
             # Get current table schema
-            cursor = await db.execute("PRAGMA table_info(watched_sets)")
+            cursor = await self._db.execute("PRAGMA table_info(watched_sets)")
             columns = await cursor.fetchall()
             existing_column_names = {col[1] for col in columns}  # Column name is at index 1
             
@@ -70,49 +97,66 @@ class Database:
             for column_name, column_type in expected_columns.items():
                 if column_name not in existing_column_names:
                     try:
-                        await db.execute(f"""
+                        await self._db.execute(f"""
                             ALTER TABLE watched_sets 
                             ADD COLUMN {column_name} {column_type}
                         """)
-                        await db.commit()
                         logger.info(f"Added missing column '{column_name}' to existing database")
                     except Exception as e:
                         logger.error(f"Error adding column '{column_name}': {e}")
+            
+            # Older versions stored last_checked as naive local-time strings
+            await self._db.execute("""
+                UPDATE watched_sets
+                SET last_checked = CAST(strftime('%s', last_checked, 'utc') AS INTEGER)
+                WHERE typeof(last_checked) = 'text'
+            """)
+        
+        # Indexes for /my-watches lookups and the monitor's last_checked ordering
+        # (created after the migration so older databases have the columns)
+        await self._db.execute("""
+            CREATE INDEX IF NOT EXISTS idx_watched_user_guild
+            ON watched_sets(user_id, guild_id)
+        """)
+        await self._db.execute("""
+            CREATE INDEX IF NOT EXISTS idx_watched_lastchecked
+            ON watched_sets(last_checked, created_at)
+        """)
+        await self._db.commit()
         
         self._initialized = True
         logger.info(f"Database initialized at {self.db_path}")
     
-    async def add_watch(self, user_id: int, set_code: str, guild_id: Optional[int] = None) -> bool:
+    async def add_watch(self, user_id: int, set_code: str, guild_id: Optional[int] = None,
+                        initial_status: Optional[str] = None, initial_button: Optional[str] = None) -> bool:
         """Add a set to a user's watchlist.
         
         Args:
             user_id: Discord user ID
             set_code: LEGO set code
             guild_id: Optional Discord guild/server ID
+            initial_status: Status from a check made while adding (stored as the last known status)
+            initial_button: Button text from that check (if any)
             
         Returns:
             True if added successfully, False if already exists
         """
         await self.initialize()
         
-        try:
-            async with aiosqlite.connect(self.db_path) as db:
-                await db.execute("""
-                    INSERT OR IGNORE INTO watched_sets (user_id, guild_id, set_code, last_status, last_checked)
-                    VALUES (?, ?, ?, ?, ?)
-                """, (user_id, guild_id, set_code, None, None))
-                await db.commit()
-                
-                # Check if row was actually inserted
-                cursor = await db.execute("""
-                    SELECT COUNT(*) FROM watched_sets
-                    WHERE user_id = ? AND guild_id = ? AND set_code = ?
-                """, (user_id, guild_id, set_code))
-                result = await cursor.fetchone()
-                return result[0] > 0
-        except Exception as e:
-            logger.error(f"Error adding watch: {e}")
-            return False
+        last_checked = _now() if initial_status is not None else None
+        
+        async with self._write_lock:
+            try:
+                cursor = await self._db.execute("""
+                    INSERT OR IGNORE INTO watched_sets (user_id, guild_id, set_code, last_status, last_button_detected, last_checked)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                """, (user_id, guild_id, set_code, initial_status, initial_button, last_checked))
+                await self._db.commit()
+                # rowcount is 0 when the row already existed and the insert was ignored
+                return cursor.rowcount > 0
+            except Exception as e:
+                logger.error(f"Error adding watch: {e}")
+                return False
     
     async def remove_watch(self, user_id: int, set_code: str, guild_id: Optional[int] = None) -> bool:
         """Remove a set from a user's watchlist.
@@ -127,17 +171,17 @@ class Database:
         """
         await self.initialize()
         
-        try:
-            async with aiosqlite.connect(self.db_path) as db:
-                cursor = await db.execute("""
+        async with self._write_lock:
+            try:
+                cursor = await self._db.execute("""
                     DELETE FROM watched_sets
                     WHERE user_id = ? AND guild_id = ? AND set_code = ?
                 """, (user_id, guild_id, set_code))
-                await db.commit()
+                await self._db.commit()
                 return cursor.rowcount > 0
-        except Exception as e:
-            logger.error(f"Error removing watch: {e}")
-            return False
+            except Exception as e:
+                logger.error(f"Error removing watch: {e}")
+                return False
     
     async def get_user_watches(self, user_id: int, guild_id: Optional[int] = None) -> List[Dict]:
         """Get all sets a user is watching.
@@ -152,20 +196,86 @@ class Database:
         await self.initialize()
         
         try:
-            async with aiosqlite.connect(self.db_path) as db:
-                db.row_factory = aiosqlite.Row
-                cursor = await db.execute("""
-                    SELECT set_code, last_status, last_checked, created_at
-                    FROM watched_sets
-                    WHERE user_id = ? AND guild_id = ?
-                    ORDER BY created_at DESC
-                """, (user_id, guild_id))
-                rows = await cursor.fetchall()
-                return [dict(row) for row in rows]
+            cursor = await self._db.execute("""
+                SELECT set_code, last_status, last_checked, created_at
+                FROM watched_sets
+                WHERE user_id = ? AND guild_id = ?
+                ORDER BY created_at DESC
+            """, (user_id, guild_id))
+            rows = await cursor.fetchall()
+            return [dict(row) for row in rows]
         except Exception as e:
             logger.error(f"Error getting user watches: {e}")
             return []
     
+    async def get_user_watches_page(self, user_id: int, guild_id: Optional[int] = None,
+                                    offset: int = 0, limit: int = 10) -> List[Dict]:
+        """Get one page of the sets a user is watching, newest first.
+        
+        Args:
+            user_id: Discord user ID
+            guild_id: Optional Discord guild/server ID
+            offset: Number of watches to skip
+            limit: Maximum number of watches to return
+            
+        Returns:
+            List of dictionaries with watch information
+        """
+        await self.initialize()
+        
+        try:
+            cursor = await self._db.execute("""
+                SELECT set_code, last_status, last_checked, created_at
+                FROM watched_sets
+                WHERE user_id = ? AND guild_id = ?
+                ORDER BY created_at DESC, id DESC
+                LIMIT ? OFFSET ?
+            """, (user_id, guild_id, limit, offset))
+            rows = await cursor.fetchall()
+            return [dict(row) for row in rows]
+        except Exception as e:
+            logger.error(f"Error getting user watches page: {e}")
+            return []
+    
+    async def get_user_watches_count(self, user_id: int, guild_id: Optional[int] = None) -> int:
+        """Count the sets a user is watching.
+        
+        Args:
+            user_id: Discord user ID
+            guild_id: Optional Discord guild/server ID
+            
+        Returns:
+            Number of watched sets
+        """
+        await self.initialize()
+        
+        try:
+            cursor = await self._db.execute("""
+                SELECT COUNT(*) FROM watched_sets
+                WHERE user_id = ? AND guild_id = ?
+            """, (user_id, guild_id))
+            row = await cursor.fetchone()
+            return row[0]
+        except Exception as e:
+            logger.error(f"Error counting user watches: {e}")
+            return 0
+    
+    async def has_watches(self) -> bool:
+        """Check whether anyone is watching any set.
+        
+        Returns:
+            True if there is at least one watch (also if the check fails)
+        """
+        await self.initialize()
+        
+        try:
+            cursor = await self._db.execute("SELECT EXISTS(SELECT 1 FROM watched_sets)")
+            row = await cursor.fetchone()
+            return bool(row[0])
+        except Exception as e:
+            logger.error(f"Error checking for watches: {e}")
+            return True
+    
     async def get_all_watches(self) -> List[Dict]:
         """Get all watched sets across all users.
         
@@ -175,19 +285,43 @@ class Database:
         await self.initialize()
         
         try:
-            async with aiosqlite.connect(self.db_path) as db:
-                db.row_factory = aiosqlite.Row
-                cursor = await db.execute("""
-                    SELECT id, user_id, guild_id, set_code, last_status, last_button_detected, last_checked
-                    FROM watched_sets
-                    ORDER BY last_checked ASC, created_at ASC
-                """)
-                rows = await cursor.fetchall()
-                return [dict(row) for row in rows]
+            cursor = await self._db.execute("""
+                SELECT id, user_id, guild_id, set_code, last_status, last_button_detected, last_checked
+                FROM watched_sets
+                ORDER BY last_checked ASC, created_at ASC
+            """)
+            rows = await cursor.fetchall()
+            return [dict(row) for row in rows]
         except Exception as e:
             logger.error(f"Error getting all watches: {e}")
             return []
     
+    async def get_due_watches(self, cutoff: int, limit: int = 500) -> List[Dict]:
+        """Get watched sets that haven't been checked since a cutoff time.
+        
+        Args:
+            cutoff: Unix epoch seconds; watches last checked before this (or never) are due
+            limit: Maximum number of watches to return
+            
+        Returns:
+            List of dictionaries with watch information, least recently checked first
+        """
+        await self.initialize()
+        
+        try:
+            cursor = await self._db.execute("""
+                SELECT id, user_id, guild_id, set_code, last_status, last_button_detected, last_checked
+                FROM watched_sets
+                WHERE last_checked IS NULL OR last_checked < ?
+                ORDER BY last_checked ASC, created_at ASC
+                LIMIT ?
+            """, (cutoff, limit))
+            rows = await cursor.fetchall()
+            return [dict(row) for row in rows]
+        except Exception as e:
+            logger.error(f"Error getting due watches: {e}")
+            return []
+    
     async def update_watch_status(self, watch_id: int, status: str, available: bool, button_detected: Optional[str] = None):
         """Update the last known status of a watched set.
         
@@ -197,18 +331,51 @@ class Database:
             available: Whether the set is available
             button_detected: The button text that was detected (if any)
         """
+        await self.bulk_update_watch_status([(watch_id, status, button_detected)])
+    
+    async def bulk_update_watch_status(self, updates: List[Tuple[int, str, Optional[str]]],
+                                       unchanged_ids: Optional[List[int]] = None):
+        """Update the last known status of several watched sets in one transaction.
+        
+        The monitor collects a whole cycle's updates and flushes them here, so a
+        sweep costs a single commit however many watches it covered.
+        
+        Args:
+            updates: (watch_id, status, button_detected) tuples
+            unchanged_ids: IDs of watches that were checked but whose status didn't
+                change; only their last checked time is updated
+        """
+        unchanged_ids = unchanged_ids or []
+        if not updates and not unchanged_ids:
+            return
+        
         await self.initialize()
         
-        try:
-            async with aiosqlite.connect(self.db_path) as db:
-                await db.execute("""
-                    UPDATE watched_sets
-                    SET last_status = ?, last_button_detected = ?, last_checked = ?
-                    WHERE id = ?
-                """, (status, button_detected, datetime.now(), watch_id))
-                await db.commit()
-        except Exception as e:
-            logger.error(f"Error updating watch status: {e}")
+        now = _now()
+        async with self._write_lock:
+            try:
+                if updates:
+                    await self._db.executemany("""
+                        UPDATE watched_sets
+                        SET last_status = ?, last_button_detected = ?, last_checked = ?
+                        WHERE id = ?
+                    """, [(status, button_detected, now, watch_id) for watch_id, status, button_detected in updates])
+                
+                # One statement per chunk, keeping under SQLite's bound parameter limit
+                for start in range(0, len(unchanged_ids), 500):
+                    chunk = unchanged_ids[start:start + 500]
+                    await self._db.execute(f"""
+                        UPDATE watched_sets SET last_checked = ?
+                        WHERE id IN ({','.join('?' * len(chunk))})
+                    """, [now, *chunk])
+                await self._db.commit()
+            except Exception as e:
+                logger.error(f"Error bulk updating watch status: {e}")
+                # Don't leave half a batch pending for the next commit to pick up
+                try:
+                    await self._db.rollback()
+                except Exception:
+                    pass
     
     async def get_watch_by_id(self, watch_id: int) -> Optional[Dict]:
         """Get a watch record by ID.
@@ -222,15 +389,13 @@ class Database:
         await self.initialize()
         
         try:
-            async with aiosqlite.connect(self.db_path) as db:
-                db.row_factory = aiosqlite.Row
-                cursor = await db.execute("""
-                    SELECT id, user_id, guild_id, set_code, last_status, last_button_detected, last_checked
-                    FROM watched_sets
-                    WHERE id = ?
-                """, (watch_id,))
-                row = await cursor.fetchone()
-                return dict(row) if row else None
+            cursor = await self._db.execute("""
+                SELECT id, user_id, guild_id, set_code, last_status, last_button_detected, last_checked
+                FROM watched_sets
+                WHERE id = ?
+            """, (watch_id,))
+            row = await cursor.fetchone()
+            return dict(row) if row else None
         except Exception as e:
             logger.error(f"Error getting watch by ID: {e}")
             return None
@@ -244,16 +409,17 @@ class Database:
         """
         await self.initialize()
         
-        try:
-            async with aiosqlite.connect(self.db_path) as db:
-                await db.execute("""
+        async with self._write_lock:
+            try:
+                await self._db.execute("""
                     INSERT OR REPLACE INTO server_settings (guild_id, notification_channel_id, updated_at)
                     VALUES (?, ?, ?)
-                """, (guild_id, channel_id, datetime.now()))
-                await db.commit()
+                """, (guild_id, channel_id, _now()))
+                await self._db.commit()
+                self._notif_cache[guild_id] = channel_id
                 logger.info(f"Set notification channel {channel_id} for guild {guild_id}")
-        except Exception as e:
-            logger.error(f"Error setting notification channel: {e}")
+            except Exception as e:
+                logger.error(f"Error setting notification channel: {e}")
     
     async def get_notification_channel(self, guild_id: int) -> Optional[int]:
         """Get the notification channel ID for a guild.
@@ -264,20 +430,54 @@ class Database:
         Returns:
             Channel ID if set, None otherwise
         """
+        if guild_id in self._notif_cache:
+            return self._notif_cache[guild_id]
+        
         await self.initialize()
         
         try:
-            async with aiosqlite.connect(self.db_path) as db:
-                cursor = await db.execute("""
-                    SELECT notification_channel_id FROM server_settings
-                    WHERE guild_id = ?
-                """, (guild_id,))
-                row = await cursor.fetchone()
-                return row[0] if row and row[0] else None
+            cursor = await self._db.execute("""
+                SELECT notification_channel_id FROM server_settings
+                WHERE guild_id = ?
+            """, (guild_id,))
+            row = await cursor.fetchone()
+            channel_id = row[0] if row and row[0] else None
+            self._notif_cache[guild_id] = channel_id
+            return channel_id
         except Exception as e:
             logger.error(f"Error getting notification channel: {e}")
             return None
     
+    async def get_notification_channels_bulk(self, guild_ids: List[int]) -> Dict[int, Optional[int]]:
+        """Get the notification channel IDs for several guilds with one query.
+        
+        Guilds already in the cache aren't queried again, and the results are
+        cached, so later get_notification_channel calls for them are free.
+        
+        Args:
+            guild_ids: Discord guild/server IDs
+            
+        Returns:
+            Dictionary mapping each guild ID to its channel ID (None if unset)
+        """
+        missing = [guild_id for guild_id in set(guild_ids) if guild_id not in self._notif_cache]
+        if missing:
+            await self.initialize()
+            
+            try:
+                placeholders = ','.join('?' * len(missing))
+                cursor = await self._db.execute(f"""
+                    SELECT guild_id, notification_channel_id FROM server_settings
+                    WHERE guild_id IN ({placeholders})
+                """, missing)
+                found = {row[0]: row[1] or None for row in await cursor.fetchall()}
+                for guild_id in missing:
+                    self._notif_cache[guild_id] = found.get(guild_id)
+            except Exception as e:
+                logger.error(f"Error getting notification channels: {e}")
+        
+        return {guild_id: self._notif_cache.get(guild_id) for guild_id in guild_ids}
+    
     async def clear_notification_channel(self, guild_id: int):
         """Clear the notification channel for a guild (revert to DMs).
         
@@ -286,13 +486,21 @@ class Database:
         """
         await self.initialize()
         
-        try:
-            async with aiosqlite.connect(self.db_path) as db:
-                await db.execute("""
+        async with self._write_lock:
+            try:
+                await self._db.execute("""
                     DELETE FROM server_settings WHERE guild_id = ?
                 """, (guild_id,))
-                await db.commit()
+                await self._db.commit()
+                self._notif_cache[guild_id] = None
                 logger.info(f"Cleared notification channel for guild {guild_id}")
-        except Exception as e:
-            logger.error(f"Error clearing notification channel: {e}")
-
+            except Exception as e:
+                logger.error(f"Error clearing notification channel: {e}")
+    
+    async def close(self):
+        """Close the database connection."""
+        if self._db is not None:
+            await self._db.close()
+            self._db = None
+        self._initialized = False
+        self._notif_cache.clear()
@@ -1,54 +1,366 @@
 """LEGO.com stock checking module."""
+import asyncio
 import cloudscraper
-from bs4 import BeautifulSoup
+import email.utils
+import hashlib
+import html
+from concurrent.futures import ThreadPoolExecutor
+from selectolax.lexbor import LexborHTMLParser
 import logging
+import orjson
+import random
+import requests
+import threading
 import time
 import re
-from typing import Optional, Dict
-from config import RATE_LIMIT_DELAY_SECONDS
+from typing import Optional, Dict, Iterator, List, Tuple
+from config import get_config
 
 logger = logging.getLogger(__name__)
 
+# Longest Retry-After we honor, so one throttled response can't stall checks indefinitely
+MAX_RETRY_AFTER_SECONDS = 120
+
+# (connect, read) timeouts for requests to LEGO.com; a short connect timeout
+# keeps a stuck connection attempt from holding a scrape thread at shutdown
+REQUEST_TIMEOUT_SECONDS = (5, 15)
+
+# Largest response body we read; anything bigger (e.g. an interstitial or a
+# media-heavy page reached via search) is not a product page worth parsing
+MAX_RESPONSE_BYTES = 2 * 1024 * 1024
+
+# Bounds and step for the adaptive delay between requests: it doubles on a
+# throttling/error response and shrinks by the step after each success
+MAX_RATE_LIMIT_DELAY_SECONDS = 30.0
+RATE_LIMIT_DECREASE_SECONDS = 0.1
+
+# A 403 recreates the scrape session at most this often; otherwise the
+# request is retried once on the existing session
+SESSION_RESET_INTERVAL_SECONDS = 300
+
+# Shipping date patterns, e.g. "ship from February 27, 2026" or "Coming Soon on February 27, 2026"
+_SHIP_RE = re.compile(r'ship\s+from\s+([A-Za-z]+\s+\d{1,2},\s+\d{4})', re.IGNORECASE)
+_COMING_RE = re.compile(r'coming\s+soon\s+on\s+([A-Za-z]+\s+\d{1,2},\s+\d{4})', re.IGNORECASE)
+_AVAILABLE_RE = re.compile(r'available\s+([A-Za-z]+\s+\d{1,2},\s+\d{4})', re.IGNORECASE)
+_SHIP_FROM_FALLBACK_RE = re.compile(r'(?:ship|ships)\s+from\s+([A-Za-z]+\s+\d{1,2},\s+\d{4})', re.IGNORECASE)
+
+# Product page links in raw search results HTML
+_PRODUCT_LINK_RE = re.compile(rb'href=["\']([^"\']*/en-us/product/[^"\']*)["\']')
+
+# Selectors for the product name and price, most specific first
+_SET_NAME_SELECTORS = (
+    'h1[data-test="product-overview-name"]',
+    'h1.product-overview__name',
+    'h1',
+    '[data-test="product-title"]',
+    '.product-title',
+)
+_PRICE_SELECTORS = (
+    '[data-test="product-price"]',
+    '.product-price',
+    '.price',
+    '[class*="price"]',
+)
+
+# JSON-LD structured data blocks; the product page has one with the Product schema
+_JSON_LD_RE = re.compile(rb'<script type="application/ld\+json"[^>]*>(.*?)</script>', re.DOTALL)
+
+# Symbols used to format structured data prices like the ones shown on the page
+_CURRENCY_SYMBOLS = {'USD': '$', 'CAD': '$', 'AUD': '$', 'EUR': '€', 'GBP': '£'}
+
+# Keyword scans, matched against lowercased text in a single pass each
+_OOS_RE = re.compile(r'out of stock|sold out|unavailable|temporarily out of stock')
+_IN_STOCK_RE = re.compile(r'in stock|add to cart|add to bag')
+_SKIP_BUTTON_RE = re.compile(r'wishlist|close|cancel|dismiss|x')
+_PURCHASE_BUTTON_RE = re.compile(r'add to bag|add to cart|pre-order|preorder|buy|purchase')
+
 
 class LEGOChecker:
     """Handles checking stock status on LEGO.com."""
     
     BASE_URL = "https://www.lego.com"
     
-    def __init__(self, rate_limit_delay: float = RATE_LIMIT_DELAY_SECONDS):
+    # LEGO.com product URLs can vary - these formats are tried in order
+    PRODUCT_URL_FORMATS = [
+        "{base}/en-us/product/{set_code}",  # Direct product code
+        "{base}/en-us/product/lego-set-{set_code}",  # With prefix
+        "{base}/product/{set_code}",  # Without locale
+    ]
+    
+    def __init__(self, rate_limit_delay: Optional[float] = None,
+                 concurrency: Optional[int] = None,
+                 cache_ttl: Optional[float] = None):
         """Initialize the LEGO checker.
         
+        Arguments left as None fall back to the configured values.
+        
         Args:
-            rate_limit_delay: Seconds to wait between requests
+            rate_limit_delay: Minimum seconds to wait between requests
+            concurrency: Maximum number of checks check_many runs at once
+            cache_ttl: Seconds check_stock_async reuses a result for the same set (0 disables)
         """
+        config = get_config()
+        if rate_limit_delay is None:
+            rate_limit_delay = config.rate_limit_delay_seconds
+        if concurrency is None:
+            concurrency = config.check_concurrency
+        if cache_ttl is None:
+            cache_ttl = config.stock_cache_ttl_seconds
+        
+        # Current delay between requests; adapts between min and max (see _adjust_rate_limit)
         self.rate_limit_delay = rate_limit_delay
+        self.min_rate_limit_delay = rate_limit_delay
+        self.max_rate_limit_delay = max(MAX_RATE_LIMIT_DELAY_SECONDS, rate_limit_delay)
+        self.concurrency = concurrency
+        self.cache_ttl = cache_ttl
+        # set_code -> (time.monotonic() when fetched, result)
+        self._cache: Dict[str, Tuple[float, Dict[str, any]]] = {}
+        # product URL -> (ETag, Last-Modified, body digest, result) of the last parsed page,
+        # for conditional requests and for skipping the parse of an unchanged body
+        self._page_cache: Dict[str, Tuple[Optional[str], Optional[str], bytes, Dict[str, any]]] = {}
+        # set_code -> scrape currently running for it in check_stock_async
+        self._inflight: Dict[str, asyncio.Future] = {}
+        # set_code -> product URL that last worked, so later checks skip the URL formats that 403/404
+        self._product_urls: Dict[str, str] = {}
+        # Product URL format that last worked for any set, tried first for sets not checked before
+        self._winning_url_format: Optional[str] = None
+        # Dedicated pool for scrapes so they don't starve the loop's default executor
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="scrape")
         self.last_request_time = 0
-        # Use cloudscraper to bypass Cloudflare protection
-        self.session = cloudscraper.create_scraper(
+        # Scrapes may run concurrently in worker threads (see check_stock_async)
+        self._rate_limit_lock = threading.Lock()
+        # No request is sent before this time.time(); pushed back by Retry-After
+        self._next_request_at = 0.0
+        # time.time() the session was last recreated after a 403
+        self._last_session_reset = 0.0
+        # Set by close(); wakes scrapes waiting on the rate limit or a retry
+        # backoff and keeps them from sending further requests
+        self._closing = threading.Event()
+        # One shared session keeps connections to LEGO.com alive between checks
+        self.session = self._create_session()
+        # Visit homepage first to establish session and get cookies
+        self._initialize_session()
+    
+    def close(self):
+        """Shut down the scrape thread pool and the HTTP session's connections.
+        
+        Scrapes still running give up at their next wait, request or body chunk
+        instead of finishing their retries.
+        """
+        self._closing.set()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self.session.close()
+    
+    def _create_session(self) -> cloudscraper.CloudScraper:
+        """Create an HTTP session that can get past Cloudflare protection.
+        
+        Returns:
+            A cloudscraper session with a connection pool sized for concurrent checks
+        """
+        session = cloudscraper.create_scraper(
             browser={
                 'browser': 'chrome',
                 'platform': 'windows',
                 'desktop': True
             }
         )
-        # Visit homepage first to establish session and get cookies
-        self._initialize_session()
+        # Remount the HTTPS adapter with one pooled keep-alive connection per
+        # scrape thread, reusing cloudscraper's TLS context (its cipher setup
+        # is part of what gets past Cloudflare)
+        adapter = session.get_adapter('https://')
+        session.mount('https://', cloudscraper.CipherSuiteAdapter(
+            ssl_context=adapter.ssl_context,
+            source_address=adapter.source_address,
+            pool_maxsize=self.concurrency
+        ))
+        # Ask for brotli as well as gzip when it can be decoded (the Brotli package is installed)
+        session.headers['Accept-Encoding'] = requests.utils.DEFAULT_ACCEPT_ENCODING
+        return session
     
     def _initialize_session(self):
         """Initialize session by visiting the homepage to get cookies."""
         try:
-            self.session.get(self.BASE_URL, timeout=15)
+            self.session.get(self.BASE_URL, timeout=REQUEST_TIMEOUT_SECONDS)
             logger.debug("Session initialized with homepage visit")
         except Exception as e:
             logger.warning(f"Could not initialize session: {e}")
     
     def _rate_limit(self):
-        """Ensure we don't make requests too quickly."""
-        current_time = time.time()
-        time_since_last = current_time - self.last_request_time
-        if time_since_last < self.rate_limit_delay:
-            time.sleep(self.rate_limit_delay - time_since_last)
-        self.last_request_time = time.time()
+        """Ensure we don't make requests too quickly (or while LEGO.com is throttling us).
+        
+        Each caller reserves the next free request slot under the lock and
+        sleeps after releasing it, so threads that only need to record a
+        response's timing (_adjust_rate_limit, the 403 handling) never wait
+        behind someone else's sleep.
+        """
+        while True:
+            with self._rate_limit_lock:
+                slot = max(time.time(), self.last_request_time + self.rate_limit_delay, self._next_request_at)
+                self.last_request_time = slot
+            
+            wait = slot - time.time()
+            if wait > 0:
+                self._closing.wait(wait)
+            
+            if self._closing.is_set():
+                raise requests.RequestException("LEGO checker is closed")
+            # A Retry-After hold set while we slept applies to this request too
+            if self._next_request_at <= time.time():
+                return
+    
+    def _adjust_rate_limit(self, response: requests.Response):
+        """Adapt the delay between requests to how LEGO.com is responding.
+        
+        Additive decrease on success, multiplicative increase on 403, 429 and
+        5xx responses or when the X-RateLimit headers say little of the quota
+        is left. An exhausted quota also holds requests back until its reset.
+        
+        Args:
+            response: The response to the last request
+        """
+        throttled = response.status_code in (403, 429) or response.status_code >= 500
+        
+        remaining = self._parse_header_number(response.headers.get('X-RateLimit-Remaining'))
+        limit = self._parse_header_number(response.headers.get('X-RateLimit-Limit'))
+        if remaining is not None and limit:
+            throttled = throttled or remaining / limit < 0.1
+        if remaining == 0:
+            reset = self._parse_header_number(response.headers.get('X-RateLimit-Reset'))
+            if reset is not None:
+                # Either seconds until the reset or an epoch timestamp
+                wait = reset - time.time() if reset > 1e9 else reset
+                wait = min(max(wait, 0.0), MAX_RETRY_AFTER_SECONDS)
+                self._next_request_at = max(self._next_request_at, time.time() + wait)
+        
+        with self._rate_limit_lock:
+            old_delay = self.rate_limit_delay
+            if throttled:
+                self.rate_limit_delay = min(self.max_rate_limit_delay, max(old_delay * 2, 1.0))
+            else:
+                self.rate_limit_delay = max(self.min_rate_limit_delay, old_delay - RATE_LIMIT_DECREASE_SECONDS)
+        
+        if throttled and self.rate_limit_delay != old_delay:
+            logger.info(f"Increased delay between requests to {self.rate_limit_delay:.1f}s")
+    
+    @staticmethod
+    def _parse_header_number(value: Optional[str]) -> Optional[float]:
+        """Parse a numeric response header.
+        
+        Args:
+            value: Header value
+            
+        Returns:
+            The number, or None if the header is missing or invalid
+        """
+        if not value:
+            return None
+        try:
+            return float(value)
+        except ValueError:
+            return None
+    
+    @staticmethod
+    def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+        """Parse a Retry-After header into seconds from now.
+        
+        Args:
+            value: Header value, either delay seconds or an HTTP date
+            
+        Returns:
+            Seconds to wait, or None if the header is missing or invalid
+        """
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+    
+    def _get_with_retry(self, url: str, attempts: int = 3,
+                        headers: Optional[Dict[str, str]] = None) -> requests.Response:
+        """GET a URL, retrying transient failures with exponential backoff.
+        
+        Connection errors, timeouts, 429 and 5xx responses are retried; any
+        other response (including 403 and 404) is returned straight away. A
+        Retry-After header on a 429/503 holds back every request from this
+        checker until it expires, and every response feeds the adaptive delay
+        between requests.
+        
+        Args:
+            url: The URL to fetch
+            attempts: Maximum number of tries
+            headers: Extra request headers
+            
+        Returns:
+            The HTTP response
+            
+        Raises:
+            requests.RequestException: If the last attempt fails to connect, the
+                response body is larger than MAX_RESPONSE_BYTES, or the checker
+                was closed
+        """
+        for attempt in range(attempts):
+            self._rate_limit()
+            backoff = 0.5 * 2 ** attempt + random.random() * 0.1
+            try:
+                response = self.session.get(url, headers=headers, timeout=REQUEST_TIMEOUT_SECONDS, stream=True)
+                self._read_body(response, url)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt == attempts - 1:
+                    raise
+                logger.warning(f"Transient error fetching {url}: {e}, retrying...")
+            else:
+                self._adjust_rate_limit(response)
+                if response.status_code != 429 and response.status_code < 500:
+                    return response
+                
+                if response.status_code in (429, 503):
+                    retry_after = self._parse_retry_after(response.headers.get('Retry-After'))
+                    if retry_after is not None:
+                        retry_after = min(retry_after, MAX_RETRY_AFTER_SECONDS)
+                        logger.warning(f"LEGO.com asked us to wait {retry_after:.0f}s ({response.status_code})")
+                        self._next_request_at = max(self._next_request_at, time.time() + retry_after)
+                        # _rate_limit waits out the Retry-After before the next attempt
+                        backoff = 0
+                
+                if attempt == attempts - 1:
+                    return response
+                logger.warning(f"{response.status_code} from {url}, retrying...")
+            
+            self._closing.wait(backoff)
+    
+    def _read_body(self, response: requests.Response, url: str):
+        """Read a streamed response's body, refusing to buffer an oversized one.
+        
+        Afterwards response.content holds the body as usual.
+        
+        Args:
+            response: Response from a stream=True request
+            url: The requested URL, for the error message
+            
+        Raises:
+            requests.RequestException: If the body is larger than MAX_RESPONSE_BYTES,
+                or the checker was closed while reading it
+        """
+        chunks = []
+        size = 0
+        for chunk in response.iter_content(chunk_size=64 * 1024):
+            if self._closing.is_set():
+                response.close()
+                raise requests.RequestException("LEGO checker is closed", response=response)
+            size += len(chunk)
+            if size > MAX_RESPONSE_BYTES:
+                response.close()
+                raise requests.RequestException(
+                    f"Response from {url} is larger than {MAX_RESPONSE_BYTES // (1024 * 1024)} MB",
+                    response=response
+                )
+            chunks.append(chunk)
+        response._content = b''.join(chunks)
     
     def _get_product_urls(self, set_code: str) -> list:
         """Get multiple possible product URLs for a set code.
@@ -57,16 +369,36 @@ class LEGOChecker:
             set_code: The LEGO set code (e.g., "10312")
             
         Returns:
-            List of possible product page URLs to try
+            List of possible product page URLs to try, most likely first
         """
-        # LEGO.com product URLs can vary - try multiple formats
-        urls = [
-            f"{self.BASE_URL}/en-us/product/{set_code}",  # Direct product code
-            f"{self.BASE_URL}/en-us/product/lego-set-{set_code}",  # With prefix
-            f"{self.BASE_URL}/product/{set_code}",  # Without locale
-        ]
+        formats = list(self.PRODUCT_URL_FORMATS)
+        # Read once, since other scrape threads may change it meanwhile
+        winning = self._winning_url_format
+        if winning:
+            formats.remove(winning)
+            formats.insert(0, winning)
+        
+        urls = [url_format.format(base=self.BASE_URL, set_code=set_code) for url_format in formats]
+        
+        # A URL that worked for this set before (possibly one found by search) goes first
+        known_url = self._product_urls.get(set_code)
+        if known_url:
+            urls = [known_url] + [url for url in urls if url != known_url]
         return urls
     
+    def _remember_product_url(self, set_code: str, url: str):
+        """Record the product URL that worked for a set.
+        
+        Args:
+            set_code: The LEGO set code
+            url: The product page URL that returned a result
+        """
+        self._product_urls[set_code] = url
+        for url_format in self.PRODUCT_URL_FORMATS:
+            if url_format.format(base=self.BASE_URL, set_code=set_code) == url:
+                self._winning_url_format = url_format
+                break
+    
     def _search_for_set(self, set_code: str) -> Optional[str]:
         """Search for a set by code and return the product URL if found.
         
@@ -76,21 +408,18 @@ class LEGOChecker:
         Returns:
             Product URL if found, None otherwise
         """
-        self._rate_limit()
         search_url = f"{self.BASE_URL}/en-us/search?q={set_code}"
         
         try:
-            response = self.session.get(search_url, timeout=15)
+            response = self._get_with_retry(search_url)
             response.raise_for_status()
             
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
             # Look for product links in search results
-            # LEGO.com search results typically have links with /en-us/product/ in them
-            product_links = soup.find_all('a', href=True)
-            for link in product_links:
-                href = link.get('href', '')
-                if '/en-us/product/' in href and set_code in href:
+            # LEGO.com search results typically have links with /en-us/product/ in them.
+            # Only the links are needed, so the raw HTML is scanned instead of parsed
+            for match in _PRODUCT_LINK_RE.finditer(response.content):
+                href = html.unescape(match.group(1).decode('utf-8', 'replace'))
+                if set_code in href:
                     if href.startswith('/'):
                         return f"{self.BASE_URL}{href}"
                     return href
@@ -103,6 +432,9 @@ class LEGOChecker:
     def check_stock(self, set_code: str) -> Dict[str, any]:
         """Check the stock status of a LEGO set.
         
+        This blocks on network I/O; from a coroutine use check_stock_async,
+        which runs it on the scrape thread pool.
+        
         Args:
             set_code: The LEGO set code (e.g., "10312")
             
@@ -119,12 +451,15 @@ class LEGOChecker:
         """
         set_code = str(set_code).strip()
         
-        # Try multiple URL formats
+        # Try multiple URL formats, starting with the one that worked last time
         urls = self._get_product_urls(set_code)
         for product_url in urls:
+            if self._closing.is_set():
+                break
             result = self._fetch_product_page(product_url, set_code)
             # If we got a successful response (not error), use it
             if result['status'] != 'error':
+                self._remember_product_url(set_code, product_url)
                 return result
             # If 403, try next URL format
             if '403' in result['message'] or 'Forbidden' in result['message']:
@@ -132,11 +467,14 @@ class LEGOChecker:
                 continue
         
         # If all direct URLs failed, try searching
-        logger.info(f"All direct URLs failed for {set_code}, trying search...")
-        search_url = self._search_for_set(set_code)
+        search_url = None
+        if not self._closing.is_set():
+            logger.info(f"All direct URLs failed for {set_code}, trying search...")
+            search_url = self._search_for_set(set_code)
         if search_url:
             result = self._fetch_product_page(search_url, set_code)
             if result['status'] != 'error':
+                self._remember_product_url(set_code, search_url)
                 return result
         
         # If everything failed, return the last error result
@@ -150,6 +488,80 @@ class LEGOChecker:
             'button_detected': None
         }
     
+    async def check_stock_async(self, set_code: str) -> Dict[str, any]:
+        """Check the stock status of a LEGO set without blocking the event loop.
+        
+        The scrape itself is synchronous (cloudscraper + selectolax), so it
+        runs on the checker's scrape thread pool while the bot keeps serving
+        other events.
+        Successful results are reused for `cache_ttl` seconds, and callers
+        asking for a set that is already being checked wait for that check,
+        so bursts of requests for the same set only hit LEGO.com once.
+        
+        Args:
+            set_code: The LEGO set code (e.g., "10312")
+            
+        Returns:
+            Dictionary with stock information (see check_stock)
+        """
+        set_code = str(set_code).strip()
+        
+        cached = self._cache.get(set_code)
+        if cached and time.monotonic() - cached[0] < self.cache_ttl:
+            logger.debug(f"Using cached result for {set_code}")
+            return cached[1]
+        
+        inflight = self._inflight.get(set_code)
+        if inflight is None:
+            loop = asyncio.get_running_loop()
+            inflight = loop.run_in_executor(self._executor, self.check_stock, set_code)
+            self._inflight[set_code] = inflight
+            inflight.add_done_callback(lambda future: self._finish_check(set_code, future))
+        else:
+            logger.debug(f"Joining in-flight check for {set_code}")
+        
+        # Shielded so one caller being cancelled doesn't cancel the check for the others
+        return await asyncio.shield(inflight)
+    
+    def _finish_check(self, set_code: str, future: asyncio.Future):
+        """Record the outcome of a finished check_stock_async scrape.
+        
+        Args:
+            set_code: The LEGO set code that was checked
+            future: The finished scrape
+        """
+        self._inflight.pop(set_code, None)
+        if future.cancelled() or future.exception() is not None:
+            return
+        
+        result = future.result()
+        # Don't cache errors so the next request retries straight away
+        if result['status'] != 'error':
+            self._cache[set_code] = (time.monotonic(), result)
+    
+    async def check_many(self, set_codes: List[str]) -> Dict[str, Dict[str, any]]:
+        """Check the stock status of several LEGO sets concurrently.
+        
+        Each distinct set is scraped once, however often it appears. At most
+        `concurrency` checks are in flight at once; requests are still spaced
+        out by the rate limiter.
+        
+        Args:
+            set_codes: LEGO set codes to check (duplicates allowed)
+            
+        Returns:
+            Dictionary mapping each set code to its stock information dictionary
+        """
+        unique_codes = list(dict.fromkeys(set_codes))
+        semaphore = asyncio.Semaphore(self.concurrency)
+        
+        async def check_one(set_code: str) -> Dict[str, any]:
+            async with semaphore:
+                return await self.check_stock_async(set_code)
+        
+        results = await asyncio.gather(*(check_one(set_code) for set_code in unique_codes))
+        return dict(zip(unique_codes, results))
+    
     def _fetch_product_page(self, url: str, set_code: str) -> Dict[str, any]:
         """Fetch and parse a product page.
         
@@ -160,37 +572,72 @@ class LEGOChecker:
         Returns:
             Dictionary with stock information
         """
-        self._rate_limit()
-        
         try:
-            response = self.session.get(url, timeout=15)
+            # Revalidate a previously parsed page; a 304 means the last result still holds
+            cached_page = self._page_cache.get(url)
+            conditional_headers = {}
+            if cached_page:
+                etag, last_modified, _, _ = cached_page
+                if etag:
+                    conditional_headers['If-None-Match'] = etag
+                if last_modified:
+                    conditional_headers['If-Modified-Since'] = last_modified
+            
+            response = self._get_with_retry(url, headers=conditional_headers)
+            if response.status_code == 304 and cached_page:
+                logger.debug(f"{url} not modified, reusing last result")
+                return dict(cached_page[3])
             
             # Handle 403 errors specifically - cloudscraper should handle this, but just in case
             if response.status_code == 403:
-                logger.warning(f"403 Forbidden for {url}, trying with fresh session...")
-                # Recreate scraper and try again
-                self.session = cloudscraper.create_scraper(
-                    browser={
-                        'browser': 'chrome',
-                        'platform': 'windows',
-                        'desktop': True
-                    }
-                )
-                self._initialize_session()
-                response = self.session.get(url, timeout=15)
+                with self._rate_limit_lock:
+                    reset_session = time.time() - self._last_session_reset > SESSION_RESET_INTERVAL_SECONDS
+                    if reset_session:
+                        self._last_session_reset = time.time()
+                
+                if reset_session:
+                    logger.warning(f"403 Forbidden for {url}, trying with fresh session...")
+                    # Recreate scraper and try again, closing the old session's
+                    # pooled connections; other scrape threads pick up the new
+                    # session on their next request
+                    with self._rate_limit_lock:
+                        old_session = self.session
+                        self.session = self._create_session()
+                        old_session.close()
+                    self._initialize_session()
+                else:
+                    # The session was reset recently; keep its cookies and
+                    # connections and retry once, after any Retry-After
+                    logger.warning(f"403 Forbidden for {url}, retrying...")
+                    retry_after = self._parse_retry_after(response.headers.get('Retry-After'))
+                    if retry_after is not None:
+                        retry_after = min(retry_after, MAX_RETRY_AFTER_SECONDS)
+                        self._next_request_at = max(self._next_request_at, time.time() + retry_after)
+                response = self._get_with_retry(url, headers=conditional_headers)
+                if response.status_code == 304 and cached_page:
+                    return dict(cached_page[3])
             
             response.raise_for_status()
             
-            soup = BeautifulSoup(response.content, 'html.parser')
+            # The same body parses to the same result, even without server-side validators
+            digest = hashlib.blake2b(response.content, digest_size=16).digest()
+            if cached_page and cached_page[2] == digest:
+                logger.debug(f"{url} unchanged, reusing last result")
+                return dict(cached_page[3])
+            
+            # Structured data gives name, price and availability without DOM lookups
+            product_schema = self._extract_product_schema(response.content)
+            
+            tree = LexborHTMLParser(response.content)
             
             # Extract set name
-            set_name = self._extract_set_name(soup, set_code)
+            set_name = (product_schema or {}).get('name') or self._extract_set_name(tree, set_code)
             
             # Extract price
-            price = self._extract_price(soup)
+            price = self._schema_price(product_schema) or self._extract_price(tree)
             
             # Check stock status
-            stock_status = self._check_stock_status(soup)
+            stock_status = self._check_stock_status(tree, product_schema)
             
             # Determine availability
             available = stock_status['available']
@@ -198,7 +645,7 @@ class LEGOChecker:
             message = stock_status['message']
             button_detected = stock_status.get('button_detected')
             
-            return {
+            result = {
                 'available': available,
                 'status': status,
                 'set_name': set_name,
@@ -208,6 +655,15 @@ class LEGOChecker:
                 'button_detected': button_detected
             }
             
+            self._page_cache[url] = (
+                response.headers.get('ETag'),
+                response.headers.get('Last-Modified'),
+                digest,
+                dict(result)
+            )
+            
+            return result
+            
         except Exception as e:
             error_msg = str(e)
             logger.error(f"Error checking {set_code}: {error_msg}")
@@ -234,99 +690,145 @@ class LEGOChecker:
                 'button_detected': None
             }
     
-    def _extract_set_name(self, soup: BeautifulSoup, set_code: str) -> str:
+    def _extract_product_schema(self, content: bytes) -> Optional[Dict[str, any]]:
+        """Extract the JSON-LD Product schema from the product page.
+        
+        Args:
+            content: Raw product page HTML
+            
+        Returns:
+            The Product schema dictionary, or None if the page has none
+        """
+        if b'"offers"' not in content:
+            return None
+        
+        for match in _JSON_LD_RE.finditer(content):
+            try:
+                data = orjson.loads(match.group(1))
+            except ValueError:
+                continue
+            if isinstance(data, dict) and data.get('@type') == 'Product':
+                return data
+        
+        return None
+    
+    def _schema_offer(self, product_schema: Optional[Dict[str, any]]) -> Optional[Dict[str, any]]:
+        """Get the offer from a Product schema.
+        
+        Args:
+            product_schema: Product schema dictionary, or None
+            
+        Returns:
+            The (first) offer dictionary, or None
+        """
+        if not product_schema:
+            return None
+        offer = product_schema.get('offers')
+        if isinstance(offer, list):
+            offer = offer[0] if offer else None
+        return offer if isinstance(offer, dict) else None
+    
+    def _schema_price(self, product_schema: Optional[Dict[str, any]]) -> Optional[str]:
+        """Format the price from a Product schema.
+        
+        Args:
+            product_schema: Product schema dictionary, or None
+            
+        Returns:
+            Price string (e.g. "$249.99") or None
+        """
+        offer = self._schema_offer(product_schema)
+        if not offer:
+            return None
+        try:
+            amount = float(offer['price'])
+        except (KeyError, TypeError, ValueError):
+            return None
+        
+        currency = offer.get('priceCurrency')
+        symbol = _CURRENCY_SYMBOLS.get(currency)
+        if symbol:
+            return f"{symbol}{amount:,.2f}"
+        return f"{amount:,.2f} {currency}" if currency else None
+    
+    def _extract_set_name(self, tree: LexborHTMLParser, set_code: str) -> str:
         """Extract the set name from the product page.
         
         Args:
-            soup: BeautifulSoup object of the product page
+            tree: Parsed product page
             set_code: Fallback set code if name not found
             
         Returns:
             The set name or fallback
         """
-        # Try multiple selectors for the product name
-        selectors = [
-            'h1[data-test="product-overview-name"]',
-            'h1.product-overview__name',
-            'h1',
-            '[data-test="product-title"]',
-            '.product-title',
-        ]
-        
-        for selector in selectors:
-            element = soup.select_one(selector)
+        # Try multiple selectors for the product name (it is always in the body)
+        scope = tree.body or tree
+        for selector in _SET_NAME_SELECTORS:
+            element = scope.css_first(selector)
             if element:
-                name = element.get_text(strip=True)
+                name = element.text(strip=True)
                 if name and len(name) > 0:
                     return name
         
         return f"LEGO Set {set_code}"
     
-    def _extract_price(self, soup: BeautifulSoup) -> Optional[str]:
+    def _extract_price(self, tree: LexborHTMLParser) -> Optional[str]:
         """Extract the price from the product page.
         
         Args:
-            soup: BeautifulSoup object of the product page
+            tree: Parsed product page
             
         Returns:
             Price string or None
         """
-        # Try multiple selectors for price
-        selectors = [
-            '[data-test="product-price"]',
-            '.product-price',
-            '.price',
-            '[class*="price"]',
-        ]
-        
-        for selector in selectors:
-            element = soup.select_one(selector)
+        # Try multiple selectors for price (it is always in the body)
+        scope = tree.body or tree
+        for selector in _PRICE_SELECTORS:
+            element = scope.css_first(selector)
             if element:
-                price = element.get_text(strip=True)
+                price = element.text(strip=True)
                 if price and ('$' in price or '€' in price or '£' in price):
                     return price
         
         return None
     
-    def _detect_button(self, soup: BeautifulSoup) -> Optional[str]:
+    def _detect_button(self, tree: LexborHTMLParser) -> Optional[str]:
         """Detect if there's a relevant button on the page (for informational purposes only).
         Only checks buttons within the add-to-bag-sticky-container class.
         
         Args:
-            soup: BeautifulSoup object of the product page
+            tree: Parsed product page
             
         Returns:
             Button text if found, None otherwise
         """
         # Only look for buttons within add-to-bag-sticky-container
-        sticky_container = soup.find('div', {'data-test': 'add-to-bag-sticky-container'})
+        sticky_container = (tree.body or tree).css_first('div[data-test="add-to-bag-sticky-container"]')
         if not sticky_container:
             return None
         
         # Find button within this container
-        buttons = sticky_container.find_all('button')
+        buttons = sticky_container.css('button')
         if not buttons:
             return None
         
         # Look for the main purchase button (not close, wishlist, etc.)
         for button in buttons:
-            button_text = button.get_text(separator=' ', strip=True)
-            button_aria = button.get('aria-label', '')
-            button_data_test = button.get('data-test', '')
+            button_text = button.text(separator=' ', strip=True)
+            button_aria = button.attributes.get('aria-label') or ''
+            button_data_test = button.attributes.get('data-test') or ''
             
             button_text_lower = button_text.lower() if button_text else ''
             button_aria_lower = button_aria.lower() if button_aria else ''
             button_data_test_lower = button_data_test.lower() if button_data_test else ''
             
             # Skip non-purchase buttons
-            skip_keywords = ['wishlist', 'close', 'cancel', 'dismiss', 'x']
-            if any(keyword in button_text_lower or keyword in button_aria_lower for keyword in skip_keywords):
+            if _SKIP_BUTTON_RE.search(button_text_lower) or _SKIP_BUTTON_RE.search(button_aria_lower):
                 continue  # Skip this button
             
             # Look for purchase-related buttons
-            purchase_keywords = ['add to bag', 'add to cart', 'pre-order', 'preorder', 'buy', 'purchase']
-            if (any(keyword in button_text_lower for keyword in purchase_keywords) or
-                any(keyword in button_aria_lower for keyword in purchase_keywords) or
+            if (_PURCHASE_BUTTON_RE.search(button_text_lower) or
+                _PURCHASE_BUTTON_RE.search(button_aria_lower) or
                 'add-to-cart' in button_data_test_lower):
                 # This is a purchase button - return it
                 if button_text and len(button_text) > 0:
@@ -337,26 +839,50 @@ class LEGOChecker:
         # If no purchase button found, return None
         return None
     
-    def _check_stock_status(self, soup: BeautifulSoup) -> Dict[str, any]:
-        """Check the stock status from the product page using meta tags and text-based detection.
+    def _availability_values(self, tree: LexborHTMLParser,
+                             product_schema: Optional[Dict[str, any]]) -> Iterator[str]:
+        """Yield the page's declared availability values, most reliable first.
+        
+        The structured data offer comes first, then the product:availability
+        meta tag (only looked up if needed).
         
         Args:
-            soup: BeautifulSoup object of the product page
+            tree: Parsed product page
+            product_schema: Product schema dictionary, or None
+            
+        Yields:
+            Lowercased availability values
+        """
+        offer = self._schema_offer(product_schema)
+        if offer and offer.get('availability'):
+            availability = str(offer['availability']).lower()
+            logger.debug(f"Found structured data availability: {availability}")
+            yield availability
+        
+        # Meta tags live in the head, so there's no need to search the body
+        availability_meta = (tree.head or tree).css_first('meta[property="product:availability"]')
+        if availability_meta:
+            availability = (availability_meta.attributes.get('content') or '').lower()
+            logger.debug(f"Found product:availability meta tag: {availability}")
+            yield availability
+    
+    def _check_stock_status(self, tree: LexborHTMLParser,
+                            product_schema: Optional[Dict[str, any]] = None) -> Dict[str, any]:
+        """Check the stock status from the product page using structured data, meta tags and text-based detection.
+        
+        Args:
+            tree: Parsed product page (script and style elements are removed from it)
+            product_schema: The page's JSON-LD Product schema, if it has one
             
         Returns:
             Dictionary with available, status, message, and button_detected
         """
-        page_text = soup.get_text().lower()
-        
         # Detect button separately (for informational purposes only)
-        button_detected = self._detect_button(soup)
+        button_detected = self._detect_button(tree)
         
-        # First, check meta property="product:availability" (most reliable)
-        availability_meta = soup.find('meta', {'property': 'product:availability'})
-        if availability_meta:
-            availability_content = availability_meta.get('content', '').lower()
-            logger.debug(f"Found product:availability meta tag: {availability_content}")
-            
+        # First, check the structured data / meta property="product:availability" (most reliable)
+        # The page text is only extracted when neither can settle the status
+        for availability_content in self._availability_values(tree, product_schema):
             if 'in stock' in availability_content or 'instock' in availability_content:
                 return {
                     'available': True,
@@ -364,15 +890,16 @@ class LEGOChecker:
                     'message': 'In Stock',
                     'button_detected': button_detected
                 }
-            elif 'out of stock' in availability_content or 'outofstock' in availability_content or 'oos' in availability_content:
+            elif ('out of stock' in availability_content or 'outofstock' in availability_content or
+                  'soldout' in availability_content or 'oos' in availability_content):
                 return {
                     'available': False,
                     'status': 'out_of_stock',
                     'message': 'Out of Stock',
                     'button_detected': button_detected
                 }
-            elif 'preorder' in availability_content or 'pre-order' in availability_content or 'preorder' in availability_content:
-                shipping_info = self._extract_shipping_date(soup)
+            elif 'preorder' in availability_content or 'pre-order' in availability_content or 'presale' in availability_content:
+                shipping_info = self._extract_shipping_date(self._get_page_text(tree))
                 message = 'Pre-Order Available'
                 if shipping_info:
                     message = f'Pre-Order - {shipping_info}'
@@ -391,14 +918,17 @@ class LEGOChecker:
                 }
         
         # Fallback: Check page text for stock status indicators
+        page_text = self._get_page_text(tree)
+        page_text_lower = page_text.lower()
+        
         # Check for "Pre-order" text patterns first
-        if 'pre-order' in page_text or 'preorder' in page_text:
-            shipping_info = self._extract_shipping_date(soup)
+        if 'pre-order' in page_text_lower or 'preorder' in page_text_lower:
+            shipping_info = self._extract_shipping_date(page_text)
             message = 'Pre-Order Available'
             if shipping_info:
                 message = f'Pre-Order - {shipping_info}'
-            elif 'ship from' in page_text or 'ships from' in page_text:
-                date_match = re.search(r'(?:ship|ships)\s+from\s+([A-Za-z]+\s+\d{1,2},\s+\d{4})', page_text, re.IGNORECASE)
+            elif 'ship from' in page_text_lower or 'ships from' in page_text_lower:
+                date_match = _SHIP_FROM_FALLBACK_RE.search(page_text)
                 if date_match:
                     message = f'Pre-Order - Ships from {date_match.group(1)}'
             
@@ -410,8 +940,8 @@ class LEGOChecker:
             }
         
         # Check for "Coming Soon" text (usually means pre-order or not yet available)
-        if 'coming soon' in page_text:
-            shipping_info = self._extract_shipping_date(soup)
+        if 'coming soon' in page_text_lower:
+            shipping_info = self._extract_shipping_date(page_text)
             message = 'Coming Soon'
             if shipping_info:
                 message = f'Coming Soon - {shipping_info}'
@@ -423,7 +953,7 @@ class LEGOChecker:
             }
         
         # Check for "Available now" (in stock)
-        if 'available now' in page_text:
+        if 'available now' in page_text_lower:
             return {
                 'available': True,
                 'status': 'in_stock',
@@ -432,18 +962,16 @@ class LEGOChecker:
             }
         
         # Check for out of stock indicators
-        out_of_stock_keywords = ['out of stock', 'sold out', 'unavailable', 'temporarily out of stock']
-        for keyword in out_of_stock_keywords:
-            if keyword in page_text:
-                return {
-                    'available': False,
-                    'status': 'out_of_stock',
-                    'message': 'Out of Stock',
-                    'button_detected': button_detected
-                }
+        if _OOS_RE.search(page_text_lower):
+            return {
+                'available': False,
+                'status': 'out_of_stock',
+                'message': 'Out of Stock',
+                'button_detected': button_detected
+            }
         
         # Check for in stock indicators
-        if any(keyword in page_text for keyword in ['in stock', 'add to cart', 'add to bag']):
+        if _IN_STOCK_RE.search(page_text_lower):
             return {
                 'available': True,
                 'status': 'in_stock',
@@ -459,33 +987,42 @@ class LEGOChecker:
             'button_detected': button_detected
         }
     
-    def _extract_shipping_date(self, soup: BeautifulSoup) -> Optional[str]:
+    def _get_page_text(self, tree: LexborHTMLParser) -> str:
+        """Get the visible text of the product page.
+        
+        Script, style and template contents are dropped from the tree first so
+        that embedded JSON doesn't produce false keyword matches.
+        
+        Args:
+            tree: Parsed product page (modified in place)
+            
+        Returns:
+            The page text
+        """
+        tree.strip_tags(['script', 'style', 'template', 'noscript'])
+        return tree.root.text() if tree.root else ''
+    
+    def _extract_shipping_date(self, page_text: str) -> Optional[str]:
         """Extract shipping/availability date from the product page.
         
         Args:
-            soup: BeautifulSoup object of the product page
+            page_text: Text of the product page, as returned by `_get_page_text`
             
         Returns:
             Shipping date string or None
         """
-        page_text = soup.get_text()
-        
-        # Look for patterns like "ship from February 27, 2026" or "Coming Soon on February 27, 2026"
         # Pattern for "ship from [date]"
-        ship_pattern = r'ship\s+from\s+([A-Za-z]+\s+\d{1,2},\s+\d{4})'
-        match = re.search(ship_pattern, page_text, re.IGNORECASE)
+        match = _SHIP_RE.search(page_text)
         if match:
             return f"Ships from {match.group(1)}"
         
         # Pattern for "Coming Soon on [date]"
-        coming_pattern = r'coming\s+soon\s+on\s+([A-Za-z]+\s+\d{1,2},\s+\d{4})'
-        match = re.search(coming_pattern, page_text, re.IGNORECASE)
+        match = _COMING_RE.search(page_text)
         if match:
             return f"Available {match.group(1)}"
         
         # Pattern for "Available [date]"
-        available_pattern = r'available\s+([A-Za-z]+\s+\d{1,2},\s+\d{4})'
-        match = re.search(available_pattern, page_text, re.IGNORECASE)
+        match = _AVAILABLE_RE.search(page_text)
         if match:
             return f"Available {match.group(1)}"
         
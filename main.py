@@ -1,37 +1,49 @@
 """Main entry point for the LEGO Stock Checker Discord Bot."""
 import asyncio
 import logging
+import logging.handlers
+import queue
 import sys
 from bot import bot
 from monitor import Monitor
-from config import DISCORD_BOT_TOKEN, MONITOR_INTERVAL_MINUTES
+from config import get_config, get_bot_token
 
 # Configure logging
+# Records are queued and written by a background listener thread, so logging
+# never blocks the event loop on console or disk I/O
+log_queue = queue.Queue(-1)
 logging.basicConfig(
     level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(sys.stdout),
-        logging.FileHandler('lego_bot.log')
-    ]
+    handlers=[logging.handlers.QueueHandler(log_queue)]
 )
+log_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+log_handlers = [
+    logging.StreamHandler(sys.stdout),
+    logging.FileHandler('lego_bot.log')
+]
+for log_handler in log_handlers:
+    log_handler.setFormatter(log_formatter)
+log_listener = logging.handlers.QueueListener(log_queue, *log_handlers, respect_handler_level=True)
 
 logger = logging.getLogger(__name__)
 
 
 async def main():
     """Main function to start the bot and monitoring."""
+    config = get_config()
+    token = get_bot_token()
+    
     try:
         # Initialize database (bot's setup_hook will also initialize, but this ensures it's ready)
         await bot.db.initialize()
         
         # Initialize monitor (will be started in bot's on_ready event)
-        monitor = Monitor(bot, bot.db, bot.lego_checker, MONITOR_INTERVAL_MINUTES)
+        monitor = Monitor(bot, bot.db, bot.lego_checker, config.monitor_interval_minutes)
         bot.monitor = monitor  # Store reference for cleanup and starting
         
         # Start the bot (monitor will start in on_ready event)
         logger.info("Starting Discord bot...")
-        await bot.start(DISCORD_BOT_TOKEN)
+        await bot.start(token)
         
     except KeyboardInterrupt:
         logger.info("Received keyboard interrupt, shutting down...")
@@ -47,6 +59,16 @@ async def main():
 
 
 if __name__ == "__main__":
+    log_listener.start()
+    
+    # uvloop is a faster drop-in event loop; it isn't available on Windows
+    try:
+        import uvloop
+        uvloop.install()
+        logger.info("Using uvloop event loop")
+    except ImportError:
+        pass
+    
     try:
         asyncio.run(main())
     except KeyboardInterrupt:
@@ -54,4 +76,7 @@ if __name__ == "__main__":
     except Exception as e:
         logger.error(f"Failed to start bot: {e}", exc_info=True)
         sys.exit(1)
+    finally:
+        # Flush queued records before exiting
+        log_listener.stop()
 
@@ -1,33 +1,81 @@
 """Background monitoring system for watched sets."""
 import asyncio
 import logging
-from typing import Optional
+import random
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
 from lego_checker import LEGOChecker
 from database import Database
-from config import MONITOR_INTERVAL_MINUTES
+from config import get_config
 import discord
 
 logger = logging.getLogger(__name__)
 
+# Notifications are sent by this many worker tasks, fed from a bounded queue
+# so a sweep with lots of changes waits for the workers instead of piling up.
+# This is the only concurrency within a sweep after the scrapes: Discord
+# sends overlap, while comparing results runs in order
+NOTIFY_WORKERS = 4
+NOTIFY_QUEUE_SIZE = 1000
+# How long stop() waits for queued notifications to be delivered
+NOTIFY_DRAIN_TIMEOUT_SECONDS = 30
+
+# Users fetched from the Discord API are reused for this long, up to this many
+USER_CACHE_TTL_SECONDS = 3600
+USER_CACHE_MAX_SIZE = 1024
+
+# How long a guild's fallback channel (for users with DMs disabled) is reused
+FALLBACK_CHANNEL_TTL_SECONDS = 300
+
+# After each sweep without any status/button change the wait grows by this
+# factor, up to the given multiple of the configured interval
+IDLE_BACKOFF_FACTOR = 1.3
+MAX_IDLE_INTERVAL_MULTIPLIER = 3
+# Every wait is randomized by up to this fraction either way
+INTERVAL_JITTER = 0.2
+# A failed sweep is retried after this long, doubling up to the maximum
+ERROR_RETRY_BASE_SECONDS = 5
+ERROR_RETRY_MAX_SECONDS = 60
+
 
 class Monitor:
     """Monitors watched sets and sends notifications on status changes."""
     
-    def __init__(self, bot, db: Database, lego_checker: LEGOChecker, interval_minutes: int = MONITOR_INTERVAL_MINUTES):
+    def __init__(self, bot, db: Database, lego_checker: LEGOChecker, interval_minutes: Optional[int] = None):
         """Initialize the monitor.
         
         Args:
             bot: The Discord bot instance
             db: Database instance
             lego_checker: LEGOChecker instance
-            interval_minutes: How often to check (in minutes)
+            interval_minutes: How often to check (in minutes, defaults to MONITOR_INTERVAL_MINUTES)
         """
+        if interval_minutes is None:
+            interval_minutes = get_config().monitor_interval_minutes
+        
         self.bot = bot
         self.db = db
         self.lego_checker = lego_checker
         self.interval_seconds = interval_minutes * 60
         self.running = False
+        # The running sweep, and the timer that starts the next one
         self.task: Optional[asyncio.Task] = None
+        self._handle: Optional[asyncio.TimerHandle] = None
+        # Sweeps in a row without any change / failed sweeps in a row, for the adaptive wait
+        self._consecutive_noop = 0
+        self._consecutive_errors = 0
+        self._had_change_this_cycle = False
+        # Set while there may be watches; cleared when a sweep finds none due,
+        # after which the monitor sleeps until notify_watch_added is called
+        self._has_watches = asyncio.Event()
+        # user_id -> (time.monotonic() when fetched, user), least recently used first
+        self._user_cache: OrderedDict[int, Tuple[float, discord.User]] = OrderedDict()
+        # guild_id -> (time.monotonic() when found, first text channel we can send to or None)
+        self._fallback_channel_cache: Dict[int, Tuple[float, Optional[int]]] = {}
+        # (kind, user_id, guild_id, set_code, result, old, new) notifications to send
+        self._notify_queue: asyncio.Queue = asyncio.Queue(maxsize=NOTIFY_QUEUE_SIZE)
+        self._notify_workers: List[asyncio.Task] = []
     
     async def start(self):
         """Start the monitoring task."""
@@ -36,55 +84,145 @@ class Monitor:
             return
         
         self.running = True
-        self.task = asyncio.create_task(self._monitor_loop())
+        self._notify_workers = [
+            asyncio.create_task(self._notify_worker()) for _ in range(NOTIFY_WORKERS)
+        ]
+        self.task = asyncio.create_task(self._tick())
         logger.info(f"Monitor started (checking every {self.interval_seconds / 60} minutes)")
     
     async def stop(self):
-        """Stop the monitoring task."""
+        """Stop the monitoring task.
+        
+        Notifications already queued are delivered first (for up to
+        NOTIFY_DRAIN_TIMEOUT_SECONDS), since their watches already store the
+        new status and won't be notified again.
+        """
         self.running = False
+        if self._handle:
+            self._handle.cancel()
+            self._handle = None
         if self.task:
             self.task.cancel()
             try:
                 await self.task
             except asyncio.CancelledError:
                 pass
+        if self._notify_workers:
+            try:
+                await asyncio.wait_for(self._notify_queue.join(), timeout=NOTIFY_DRAIN_TIMEOUT_SECONDS)
+            except asyncio.TimeoutError:
+                logger.warning(f"Gave up on {self._notify_queue.qsize()} queued notification(s) while stopping")
+        for worker in self._notify_workers:
+            worker.cancel()
+        await asyncio.gather(*self._notify_workers, return_exceptions=True)
+        self._notify_workers = []
         logger.info("Monitor stopped")
     
-    async def _monitor_loop(self):
-        """Main monitoring loop."""
-        while self.running:
-            try:
-                await self._check_all_watches()
-            except Exception as e:
-                logger.error(f"Error in monitor loop: {e}")
-            
-            # Wait for the interval before checking again
-            await asyncio.sleep(self.interval_seconds)
+    async def _tick(self):
+        """Run one sweep, then arm the timer for the next one."""
+        self._had_change_this_cycle = False
+        try:
+            if not self._has_watches.is_set():
+                if await self.db.has_watches():
+                    self._has_watches.set()
+                else:
+                    logger.debug("Nothing is being watched, waiting for a watch to be added")
+                    await self._has_watches.wait()
+            await self._check_all_watches()
+            self._consecutive_errors = 0
+        except Exception as e:
+            logger.error(f"Error in monitor loop: {e}")
+            self._consecutive_errors += 1
+        
+        if not self.running:
+            return
+        
+        # Wait before checking again
+        delay = self._next_delay()
+        logger.debug(f"Next check in {delay:.0f}s")
+        self._handle = asyncio.get_running_loop().call_later(delay, self._start_tick)
+    
+    def _start_tick(self):
+        """Timer callback starting the next sweep."""
+        self._handle = None
+        if self.running:
+            self.task = asyncio.create_task(self._tick())
+    
+    def _next_delay(self) -> float:
+        """Work out how long to wait before the next sweep.
+        
+        Quiet periods stretch the interval (up to MAX_IDLE_INTERVAL_MULTIPLIER
+        times), any change resets it, and failed sweeps retry with a short
+        exponential backoff. Jitter keeps bot instances from hitting LEGO.com
+        in lockstep.
+        
+        Returns:
+            Seconds to sleep
+        """
+        if self._consecutive_errors:
+            delay = min(ERROR_RETRY_BASE_SECONDS * 2 ** (self._consecutive_errors - 1), ERROR_RETRY_MAX_SECONDS)
+        else:
+            if self._had_change_this_cycle:
+                self._consecutive_noop = 0
+            else:
+                # Capped so the exponent stays small once the maximum is reached
+                self._consecutive_noop = min(self._consecutive_noop + 1, 20)
+            delay = min(self.interval_seconds * IDLE_BACKOFF_FACTOR ** self._consecutive_noop,
+                        self.interval_seconds * MAX_IDLE_INTERVAL_MULTIPLIER)
+        
+        return delay * random.uniform(1 - INTERVAL_JITTER, 1 + INTERVAL_JITTER)
     
     async def _check_all_watches(self):
-        """Check all watched sets for status changes."""
-        watches = await self.db.get_all_watches()
+        """Check all watched sets that are due for status changes."""
+        # Skip watches checked within the last half interval, e.g. sets that
+        # were just added with /watch (which records their current status)
+        cutoff = int(time.time() - self.interval_seconds / 2)
+        watches = await self.db.get_due_watches(cutoff)
         
         if not watches:
-            logger.debug("No watches to check")
+            logger.debug("No watches due for checking")
+            # Have the next tick check whether there are any watches at all
+            self._has_watches.clear()
             return
         
         logger.info(f"Checking {len(watches)} watched set(s)...")
         
-        for watch in watches:
-            if not self.running:
-                break
-            
-            try:
-                await self._check_watch(watch)
-            except Exception as e:
-                logger.error(f"Error checking watch {watch.get('id')}: {e}")
+        # Scrape each distinct set once, several at a time (bounded by the
+        # checker's concurrency), then process the watches against the results
+        results = await self.lego_checker.check_many([watch['set_code'] for watch in watches])
+        
+        # Load every involved guild's notification channel with one query up front
+        await self.db.get_notification_channels_bulk(
+            list({watch['guild_id'] for watch in watches if watch['guild_id']})
+        )
+        
+        # Status updates are collected and written in a single transaction,
+        # also when the monitor is stopped part way through; watches whose
+        # status didn't change only get their last_checked time bumped
+        updates = []
+        unchanged_ids = []
+        
+        # Comparing results is cheap and notifications go to the worker queue,
+        # so the watches are simply processed in order without a task each
+        try:
+            for watch in watches:
+                if not self.running:
+                    break
+                try:
+                    await self._check_watch(watch, results[watch['set_code']], updates, unchanged_ids)
+                except Exception as e:
+                    logger.error(f"Error checking watch {watch.get('id')}: {e}")
+        finally:
+            await self.db.bulk_update_watch_status(updates, unchanged_ids)
     
-    async def _check_watch(self, watch: dict):
+    async def _check_watch(self, watch: dict, result: dict, updates: list, unchanged_ids: list):
         """Check a single watch and notify if status or button changed.
         
         Args:
             watch: Dictionary with watch information
+            result: Current stock check result for the watched set
+            updates: List to append the (watch_id, status, button_detected) update to
+            unchanged_ids: List to append the watch ID to instead when nothing changed
         """
         watch_id = watch['id']
         user_id = watch['user_id']
@@ -93,14 +231,9 @@ class Monitor:
         last_status = watch['last_status']
         last_button_detected = watch.get('last_button_detected')
         
-        # Check current stock status
-        result = self.lego_checker.check_stock(set_code)
         current_status = result['status']
         current_button_detected = result.get('button_detected')
         
-        # Update the watch record
-        await self.db.update_watch_status(watch_id, current_status, result['available'], current_button_detected)
-        
         # Check if status changed
         status_changed = last_status is not None and last_status != current_status
         
@@ -115,21 +248,121 @@ class Monitor:
                 button_changed = True
                 logger.info(f"Button changed for set {set_code} (user {user_id}): {last_button_detected} -> {current_button_detected}")
         
+        if last_status is not None and (status_changed or button_changed):
+            self._had_change_this_cycle = True
+        
+        # Queue a notification if status changed or button appeared/changed
         if last_status is None:
             # First check - don't notify, just record
             logger.debug(f"First check for set {set_code} (user {user_id}): {current_status}")
-            return
-        
-        # Send notification if status changed or button appeared/changed
-        if status_changed:
+        elif status_changed:
             logger.info(f"Status changed for set {set_code} (user {user_id}): {last_status} -> {current_status}")
-            await self._send_notification(user_id, guild_id, set_code, result, last_status, current_status)
+            await self._notify_queue.put(
+                ('status', user_id, guild_id, set_code, result, last_status, current_status)
+            )
         elif button_changed:
             # Button appeared or changed - send notification
             logger.info(f"Button change detected for set {set_code} (user {user_id})")
-            await self._send_button_notification(user_id, guild_id, set_code, result, last_button_detected, current_button_detected)
+            await self._notify_queue.put(
+                ('button', user_id, guild_id, set_code, result, last_button_detected, current_button_detected)
+            )
         else:
             logger.debug(f"No change for set {set_code} (user {user_id}): {current_status}")
+        
+        # Queue the watch record update only once its notification is queued,
+        # so a sweep cancelled while waiting for queue space doesn't record a
+        # change nobody was told about
+        if (current_status, current_button_detected) != (last_status, last_button_detected):
+            updates.append((watch_id, current_status, current_button_detected))
+        else:
+            unchanged_ids.append(watch_id)
+    
+    async def _notify_worker(self):
+        """Send queued notifications one at a time until cancelled."""
+        while True:
+            kind, user_id, guild_id, set_code, result, old, new = await self._notify_queue.get()
+            try:
+                if kind == 'status':
+                    await self._send_notification(user_id, guild_id, set_code, result, old, new)
+                else:
+                    await self._send_button_notification(user_id, guild_id, set_code, result, old, new)
+            except Exception as e:
+                logger.error(f"Error sending queued {kind} notification for set {set_code}: {e}")
+            finally:
+                self._notify_queue.task_done()
+    
+    async def _resolve_user(self, user_id: int) -> Optional[discord.User]:
+        """Get a user to notify, fetching them from the Discord API only when needed.
+        
+        Args:
+            user_id: Discord user ID
+            
+        Returns:
+            The user, or None if they can't be found
+        """
+        user = self.bot.get_user(user_id)
+        if user:
+            return user
+        
+        cached = self._user_cache.get(user_id)
+        if cached and time.monotonic() - cached[0] < USER_CACHE_TTL_SECONDS:
+            self._user_cache.move_to_end(user_id)
+            return cached[1]
+        
+        # Try to fetch user if not in cache
+        try:
+            user = await self.bot.fetch_user(user_id)
+        except discord.NotFound:
+            logger.warning(f"User {user_id} not found, skipping notification")
+            return None
+        except Exception as e:
+            logger.error(f"Error fetching user {user_id}: {e}")
+            return None
+        
+        self._user_cache[user_id] = (time.monotonic(), user)
+        self._user_cache.move_to_end(user_id)
+        if len(self._user_cache) > USER_CACHE_MAX_SIZE:
+            self._user_cache.popitem(last=False)
+        return user
+    
+    def _get_fallback_channel(self, guild: discord.Guild) -> Optional[discord.TextChannel]:
+        """Get the first text channel in a guild the bot can send to.
+        
+        The result of the channel scan is cached per guild for
+        FALLBACK_CHANNEL_TTL_SECONDS.
+        
+        Args:
+            guild: The Discord guild
+            
+        Returns:
+            A text channel, or None if the bot can't send anywhere
+        """
+        cached = self._fallback_channel_cache.get(guild.id)
+        if cached and time.monotonic() - cached[0] < FALLBACK_CHANNEL_TTL_SECONDS:
+            if cached[1] is None:
+                return None
+            channel = guild.get_channel(cached[1])
+            if channel:
+                return channel
+        
+        channel = next(
+            (channel for channel in guild.text_channels if channel.permissions_for(guild.me).send_messages),
+            None
+        )
+        self._fallback_channel_cache[guild.id] = (time.monotonic(), channel.id if channel else None)
+        return channel
+    
+    def notify_watch_added(self):
+        """Wake the monitor if it's idle because nothing was being watched."""
+        self._has_watches.set()
+    
+    def invalidate_guild(self, guild_id: int):
+        """Forget the cached fallback channel for a guild, e.g. after its channels changed.
+        
+        Args:
+            guild_id: Discord guild/server ID
+        """
+        self._fallback_channel_cache.pop(guild_id, None)
     
     async def _send_notification(self, user_id: int, guild_id: Optional[int], set_code: str, 
                                  result: dict, old_status: str, new_status: str):
@@ -144,18 +377,6 @@ class Monitor:
             new_status: New status
         """
         try:
-            user = self.bot.get_user(user_id)
-            if not user:
-                # Try to fetch user if not in cache
-                try:
-                    user = await self.bot.fetch_user(user_id)
-                except discord.NotFound:
-                    logger.warning(f"User {user_id} not found, skipping notification")
-                    return
-                except Exception as e:
-                    logger.error(f"Error fetching user {user_id}: {e}")
-                    return
-            
             # Determine notification message based on status change
             if new_status == 'in_stock' and result['available']:
                 title = "✅ Set is Now In Stock!"
@@ -190,69 +411,15 @@ class Monitor:
             # Add button detected information if available
             if result.get('button_detected'):
                 button_text = result['button_detected']
-                button_lower = button_text.lower()
-                
-                # Choose emoji based on button type
-                if 'pre-order' in button_lower or 'preorder' in button_lower:
-                    emoji = "⏰"  # Clock for pre-order
-                elif 'add to bag' in button_lower or 'add to cart' in button_lower:
-                    emoji = "🛒"  # Shopping cart for add to bag/cart
-                elif 'notify' in button_lower:
-                    emoji = "🔔"  # Bell for notify
-                elif 'out of stock' in button_lower or 'sold out' in button_lower:
-                    emoji = "❌"  # X for out of stock
-                else:
-                    emoji = "🔘"  # Default button emoji
-                
                 embed.add_field(
-                    name=f"{emoji} Button Detected", 
+                    name=f"{self.bot.get_button_emoji(button_text)} Button Detected", 
                     value=f"```\n{button_text}\n```", 
                     inline=False
                 )
             
             embed.set_footer(text="LEGO.com")
             
-            # Check if server has a notification channel set
-            notification_sent = False
-            if guild_id:
-                notification_channel_id = await self.db.get_notification_channel(guild_id)
-                if notification_channel_id:
-                    try:
-                        channel = self.bot.get_channel(notification_channel_id)
-                        if channel and channel.permissions_for(channel.guild.me).send_messages:
-                            await channel.send(f"<@{user_id}>", embed=embed)
-                            logger.info(f"Sent notification to user {user_id} in channel {notification_channel_id} for set {set_code}")
-                            notification_sent = True
-                        else:
-                            logger.warning(f"Notification channel {notification_channel_id} not accessible, falling back to DM")
-                    except Exception as e:
-                        logger.error(f"Error sending to notification channel: {e}")
-            
-            # If no notification channel or it failed, try DM
-            if not notification_sent:
-                try:
-                    await user.send(embed=embed)
-                    logger.info(f"Sent notification to user {user_id} via DM for set {set_code}")
-                except discord.Forbidden:
-                    # User has DMs disabled, try to send in guild if available
-                    if guild_id:
-                        try:
-                            guild = self.bot.get_guild(guild_id)
-                            if guild:
-                                # Try to find a channel we can send to
-                                for channel in guild.text_channels:
-                                    if channel.permissions_for(guild.me).send_messages:
-                                        await channel.send(f"<@{user_id}>", embed=embed)
-                                        logger.info(f"Sent notification to user {user_id} in guild {guild_id} for set {set_code}")
-                                        break
-                                else:
-                                    logger.warning(f"Could not send notification to user {user_id} - no accessible channels")
-                        except Exception as e:
-                            logger.error(f"Error sending notification in guild: {e}")
-                    else:
-                        logger.warning(f"Could not send notification to user {user_id} - DMs disabled and no guild")
-                except Exception as e:
-                    logger.error(f"Error sending notification to user {user_id}: {e}")
+            await self._dispatch(user_id, guild_id, embed, set_code, "notification")
                 
         except Exception as e:
             logger.error(f"Unexpected error in _send_notification: {e}")
@@ -270,18 +437,6 @@ class Monitor:
             new_button: New button text (or None)
         """
         try:
-            user = self.bot.get_user(user_id)
-            if not user:
-                # Try to fetch user if not in cache
-                try:
-                    user = await self.bot.fetch_user(user_id)
-                except discord.NotFound:
-                    logger.warning(f"User {user_id} not found, skipping button notification")
-                    return
-                except Exception as e:
-                    logger.error(f"Error fetching user {user_id}: {e}")
-                    return
-            
             # Determine notification message based on button change
             if old_button is None and new_button is not None:
                 title = "🔘 Button Detected!"
@@ -307,21 +462,8 @@ class Monitor:
                 embed.add_field(name="Previous Button", value="None", inline=True)
             
             if new_button:
-                # Choose emoji based on button type
-                button_lower = new_button.lower()
-                if 'pre-order' in button_lower or 'preorder' in button_lower:
-                    emoji = "⏰"
-                elif 'add to bag' in button_lower or 'add to cart' in button_lower:
-                    emoji = "🛒"
-                elif 'notify' in button_lower:
-                    emoji = "🔔"
-                elif 'out of stock' in button_lower or 'sold out' in button_lower:
-                    emoji = "❌"
-                else:
-                    emoji = "🔘"
-                
                 embed.add_field(
-                    name=f"{emoji} Current Button", 
+                    name=f"{self.bot.get_button_emoji(new_button)} Current Button", 
                     value=f"```\n{new_button}\n```", 
                     inline=False
                 )
@@ -335,48 +477,69 @@ class Monitor:
             
             embed.set_footer(text="LEGO.com")
             
-            # Check if server has a notification channel set
-            notification_sent = False
+            await self._dispatch(user_id, guild_id, embed, set_code, "button notification")
+                
+        except Exception as e:
+            logger.error(f"Unexpected error in _send_button_notification: {e}")
+    
+    async def _dispatch(self, user_id: int, guild_id: Optional[int], embed: discord.Embed,
+                        set_code: str, kind: str):
+        """Deliver a notification embed to a user.
+        
+        Tries the guild's notification channel first, then a DM, then the
+        first guild channel the bot can send to (for users with DMs disabled).
+        
+        Args:
+            user_id: Discord user ID
+            guild_id: Optional Discord guild/server ID
+            embed: The notification embed
+            set_code: LEGO set code (for logging)
+            kind: What is being sent, e.g. "notification" (for logging)
+        """
+        user = await self._resolve_user(user_id)
+        if not user:
+            return
+        
+        # Check if server has a notification channel set (answered from the
+        # database's channel cache, which each sweep fills with one query)
+        if guild_id:
+            notification_channel_id = await self.db.get_notification_channel(guild_id)
+            if notification_channel_id:
+                try:
+                    channel = self.bot.get_channel(notification_channel_id)
+                    if channel and channel.permissions_for(channel.guild.me).send_messages:
+                        await channel.send(f"<@{user_id}>", embed=embed)
+                        logger.info(f"Sent {kind} to user {user_id} in channel {notification_channel_id} for set {set_code}")
+                        return
+                    logger.warning(f"Notification channel {notification_channel_id} not accessible, falling back to DM")
+                except Exception as e:
+                    logger.error(f"Error sending to notification channel: {e}")
+        
+        # If no notification channel or it failed, try DM
+        try:
+            await user.send(embed=embed)
+            logger.info(f"Sent {kind} to user {user_id} via DM for set {set_code}")
+        except discord.Forbidden:
+            # User has DMs disabled, try to send in guild if available
             if guild_id:
-                notification_channel_id = await self.db.get_notification_channel(guild_id)
-                if notification_channel_id:
-                    try:
-                        channel = self.bot.get_channel(notification_channel_id)
-                        if channel and channel.permissions_for(channel.guild.me).send_messages:
-                            await channel.send(f"<@{user_id}>", embed=embed)
-                            logger.info(f"Sent button notification to user {user_id} in channel {notification_channel_id} for set {set_code}")
-                            notification_sent = True
-                        else:
-                            logger.warning(f"Notification channel {notification_channel_id} not accessible, falling back to DM")
-                    except Exception as e:
-                        logger.error(f"Error sending to notification channel: {e}")
-            
-            # If no notification channel or it failed, try DM
-            if not notification_sent:
                 try:
-                    await user.send(embed=embed)
-                    logger.info(f"Sent button notification to user {user_id} via DM for set {set_code}")
-                except discord.Forbidden:
-                    # User has DMs disabled, try to send in guild if available
-                    if guild_id:
-                        try:
-                            guild = self.bot.get_guild(guild_id)
-                            if guild:
-                                # Try to find a channel we can send to
-                                for channel in guild.text_channels:
-                                    if channel.permissions_for(guild.me).send_messages:
-                                        await channel.send(f"<@{user_id}>", embed=embed)
-                                        logger.info(f"Sent button notification to user {user_id} in guild {guild_id} for set {set_code}")
-                                        break
-                                else:
-                                    logger.warning(f"Could not send button notification to user {user_id} - no accessible channels")
-                        except Exception as e:
-                            logger.error(f"Error sending button notification in guild: {e}")
-                    else:
-                        logger.warning(f"Could not send button notification to user {user_id} - DMs disabled and no guild")
+                    guild = self.bot.get_guild(guild_id)
+                    if guild:
+                        # Try to find a channel we can send to
+                        channel = self._get_fallback_channel(guild)
+                        if channel:
+                            try:
+                                await channel.send(f"<@{user_id}>", embed=embed)
+                            except Exception:
+                                # Rescan next time in case the channel or permissions changed
+                                self.invalidate_guild(guild_id)
+                                raise
+                            logger.info(f"Sent {kind} to user {user_id} in guild {guild_id} for set {set_code}")
+                        else:
+                            logger.warning(f"Could not send {kind} to user {user_id} - no accessible channels")
                 except Exception as e:
-                    logger.error(f"Error sending button notification to user {user_id}: {e}")
-                
+                    logger.error(f"Error sending {kind} in guild: {e}")
+            else:
+                logger.warning(f"Could not send {kind} to user {user_id} - DMs disabled and no guild")
         except Exception as e:
-            logger.error(f"Unexpected error in _send_button_notification: {e}")
-
+            logger.error(f"Error sending {kind} to user {user_id}: {e}")
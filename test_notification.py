@@ -5,7 +5,7 @@ from bot import bot
 from monitor import Monitor
 from database import Database
 from lego_checker import LEGOChecker
-from config import DISCORD_BOT_TOKEN
+from config import get_bot_token
 
 async def test_notification():
     """Test sending a notification."""
@@ -16,7 +16,8 @@ async def test_notification():
     db = Database()
     await db.initialize()
     
-    lego_checker = LEGOChecker()
+    # Creating the checker visits LEGO.com, so keep that off the event loop
+    lego_checker = await asyncio.to_thread(LEGOChecker)
     monitor = Monitor(bot, db, lego_checker, interval_minutes=5)
     
     # You'll need to provide your Discord user ID and optionally a guild ID
@@ -49,7 +50,7 @@ async def test_notification():
     
     # Check stock
     print(f"\nChecking stock for set {set_code}...")
-    result = lego_checker.check_stock(set_code)
+    result = await lego_checker.check_stock_async(set_code)
     
     print(f"\nStock Check Result:")
     print(f"  Set Name: {result['set_name']}")
@@ -63,7 +64,7 @@ async def test_notification():
     
     try:
         # Start bot in background
-        bot_task = asyncio.create_task(bot.start(DISCORD_BOT_TOKEN))
+        bot_task = asyncio.create_task(bot.start(get_bot_token()))
         
         # Wait a bit for bot to connect
         await asyncio.sleep(3)
@@ -111,6 +112,13 @@ async def test_notification():
         await bot.close()
 
 if __name__ == '__main__':
+    # Run on the same event loop as the bot (uvloop isn't available on Windows)
+    try:
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        pass
+    
     try:
         asyncio.run(test_notification())
     except KeyboardInterrupt:
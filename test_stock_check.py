@@ -1,28 +1,39 @@
 """Test script for LEGO stock checking functionality."""
 import asyncio
+from typing import Optional
 from lego_checker import LEGOChecker
-from bs4 import BeautifulSoup
+from selectolax.lexbor import LexborHTMLParser
 
-def test_with_html_file(filename: str, set_code: str):
+def _check_html_file(checker: LEGOChecker, filename: str):
+    """Parse a local HTML file and run the checker's detection on it."""
+    # Read the HTML file as bytes and parse it the same way a live check does
+    with open(filename, 'rb') as f:
+        content = f.read()
+    
+    product_schema = checker._extract_product_schema(content)
+    tree = LexborHTMLParser(content)
+    
+    button_detected = checker._detect_button(tree)
+    stock_status = checker._check_stock_status(tree, product_schema)
+    availability_meta = tree.css_first('meta[property="product:availability"]')
+    availability = availability_meta.attributes.get('content') if availability_meta else None
+    return button_detected, stock_status, availability
+
+async def test_with_html_file(filename: str, set_code: str, checker: Optional[LEGOChecker] = None):
     """Test stock checking with a local HTML file."""
+    checker = checker or LEGOChecker()
+    
+    # Reading and parsing run in a worker thread, like live checks do
+    button_detected, stock_status, availability = await asyncio.to_thread(_check_html_file, checker, filename)
+    
     print(f"\n{'='*60}")
     print(f"Testing: {filename} (Set {set_code})")
     print('='*60)
     
-    checker = LEGOChecker()
-    
-    # Read the HTML file
-    with open(filename, 'r', encoding='utf-8') as f:
-        html = f.read()
-    
-    soup = BeautifulSoup(html, 'html.parser')
-    
     # Test button detection
-    button_detected = checker._detect_button(soup)
     print(f"\nButton Detected: {button_detected}")
     
     # Test stock status
-    stock_status = checker._check_stock_status(soup)
     print(f"\nStock Status:")
     print(f"  Available: {stock_status['available']}")
     print(f"  Status: {stock_status['status']}")
@@ -30,21 +41,23 @@ def test_with_html_file(filename: str, set_code: str):
     print(f"  Button: {stock_status.get('button_detected', 'None')}")
     
     # Test meta tag detection
-    availability_meta = soup.find('meta', {'property': 'product:availability'})
-    if availability_meta:
-        print(f"\nMeta Tag (product:availability): {availability_meta.get('content', 'Not found')}")
-    else:
-        print("\nMeta Tag (product:availability): Not found")
+    print(f"\nMeta Tag (product:availability): {availability or 'Not found'}")
     
     return stock_status
 
-def test_live_check(set_code: str):
+async def test_html_files(cases, checker: Optional[LEGOChecker] = None):
+    """Run test_with_html_file for several (filename, set_code) cases concurrently."""
+    checker = checker or LEGOChecker()
+    return await asyncio.gather(*(test_with_html_file(filename, set_code, checker)
+                                  for filename, set_code in cases))
+
+def test_live_check(set_code: str, checker: Optional[LEGOChecker] = None):
     """Test live stock checking (requires internet connection)."""
     print(f"\n{'='*60}")
     print(f"Testing Live Check: Set {set_code}")
     print('='*60)
     
-    checker = LEGOChecker()
+    checker = checker or LEGOChecker()
     
     try:
         result = checker.check_stock(set_code)
@@ -65,15 +78,22 @@ if __name__ == '__main__':
     print("LEGO Stock Checker - Test Script")
     print("=" * 60)
     
+    # One checker (and its pooled HTTP session) is shared by all tests
+    checker = LEGOChecker()
+    
     # Test with HTML files
     print("\n1. Testing with HTML files...")
-    test_with_html_file('in_stock.html', '11371')
-    test_with_html_file('preorder.html', '72153')
-    test_with_html_file('preorder_no_button.html', '72152')
+    asyncio.run(test_html_files([
+        ('in_stock.html', '11371'),
+        ('preorder.html', '72153'),
+        ('preorder_no_button.html', '72152'),
+    ], checker))
     
     # Test live check (optional - uncomment to test)
     print("\n2. Testing live check (optional)...")
     print("   Uncomment the line below to test live checking")
-    # test_live_check('11371')  # Shopping Street
-    # test_live_check('72152')  # Pikachu
+    # test_live_check('11371', checker)  # Shopping Street
+    # test_live_check('72152', checker)  # Pikachu
+    
+    checker.close()
 